@@ -30,9 +30,47 @@ def create_app():
         dbname.set(f"{config.MANIFEST_DB_PREFIX}_{lang}")
         return await call_next(request)
 
+    # Every BaseHTTPMiddleware costs a task and a body stream per request, only
+    # pay for profiling when it can actually be triggered
+    if str(config.ADMIN_TOKEN) or config.PROFILE_SAMPLE_RATE > 0:
+        from .profiling import ProfilingMiddleware
+
+        app.middleware("http")(
+            ProfilingMiddleware(
+                admin_token=str(config.ADMIN_TOKEN),
+                sample_rate=config.PROFILE_SAMPLE_RATE,
+                sample_interval=config.PROFILE_SAMPLE_INTERVAL,
+                directory=config.LOG_FILE_PATH / "profiles",
+                max_reports=config.PROFILE_MAX_REPORTS,
+            )
+        )
+
+    if config.ADMISSION_ENABLED:
+        import math
+
+        from .admission import AdmissionController
+
+        admission = AdmissionController(
+            AdmissionController.parse_route_limits(config.ADMISSION_ROUTE_LIMITS),
+            lag_threshold=config.ADMISSION_LOOP_LAG_THRESHOLD,
+            pool=mongo.manager.listeners["serving"],
+            pool_threshold=math.ceil(
+                config.ADMISSION_POOL_THRESHOLD * config.MONGO_SERVING_MAX_POOL_SIZE
+            ),
+            client_rate=config.ADMISSION_CLIENT_RATE,
+            client_burst=config.ADMISSION_CLIENT_BURST,
+            quota_routes=[route.strip() for route in config.ADMISSION_QUOTA_ROUTES],
+            client_header=config.ADMISSION_CLIENT_HEADER,
+        )
+        app.state.admission = admission
+        # Added last so that it runs first and rejects before any other work
+        app.middleware("http")(admission)
+        app.on_event("startup")(admission.lag_monitor.start)
+        app.on_event("shutdown")(admission.lag_monitor.stop)
+
     from fastapi.responses import JSONResponse
 
-    from .models.base_model import CannotFindEntity, MissingHashOrName
+    from .models.base_model import CannotFindEntity, InvalidField, MissingHashOrName
 
     @app.exception_handler(CannotFindEntity)
     async def cannot_find_entity_handler(request: Request, exc: CannotFindEntity):
@@ -42,6 +80,10 @@ def create_app():
     async def missing_hash_or_name_handler(request: Request, exc: MissingHashOrName):
         return JSONResponse({"message": exc.message}, 400)
 
+    @app.exception_handler(InvalidField)
+    async def invalid_field_handler(request: Request, exc: InvalidField):
+        return JSONResponse({"message": exc.message}, 400)
+
     @app.on_event("startup")
     async def run_schduler():
         from datetime import datetime
@@ -59,4 +101,14 @@ def create_app():
         scheduler.start()
         scheduler.modify_job("update_manifest", next_run_time=datetime.now())
 
+    @app.on_event("shutdown")
+    async def shutdown():
+        from ..tasks import scheduler
+        from ..utils.functions import close_http_client
+
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+        await mongo.manager.close()
+        await close_http_client()
+
     return app
@@ -0,0 +1,198 @@
+import asyncio
+import math
+from collections import OrderedDict, defaultdict
+from typing import AsyncIterator, Awaitable, Callable, Protocol
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+
+from ..utils.functions import TokenBucket
+
+
+class LoopLagMonitor:
+    """
+    Measure how late the event loop wakes up a sleeping task
+    """
+
+    def __init__(self, interval: float = 0.1) -> None:
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            # Smooth single hiccups out, but react quickly to sustained lag
+            self.lag = lag if lag > self.lag else 0.7 * self.lag + 0.3 * lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class PoolUsage(Protocol):
+    in_use: int
+
+
+class AdmissionController:
+    """
+    Shed load before it slows every request of the worker down
+
+    Routes listed in `route_limits` are expensive, they are limited in
+    concurrency and rejected while the event loop lags behind or while the
+    MongoDB pool is close to exhausted, so that cheap routes stay responsive.
+    Clients calling routes under `quota_routes` are additionally limited by a
+    token bucket, keyed on `client_header` when the app runs behind a proxy
+    that sets it.
+    """
+
+    def __init__(
+        self,
+        route_limits: dict[str, int],
+        *,
+        lag_threshold: float,
+        pool: PoolUsage | None = None,
+        pool_threshold: int = 0,
+        client_rate: float,
+        client_burst: int,
+        quota_routes: list[str] | None = None,
+        client_header: str = "",
+        max_clients: int = 10000,
+    ) -> None:
+        self.route_limits = route_limits
+        self.quota_routes = (
+            list(route_limits) if quota_routes is None else list(quota_routes)
+        )
+        self.client_header = client_header.lower()
+        self.lag_threshold = lag_threshold
+        self.pool = pool
+        self.pool_threshold = pool_threshold
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.lag_monitor = LoopLagMonitor()
+        self.in_flight: dict[str, int] = defaultdict(int)
+        self.rejected: dict[str, int] = defaultdict(int)
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    @staticmethod
+    def parse_route_limits(limits: list[str]) -> dict[str, int]:
+        """
+        Parse `["/weapon/=64", "/weapons/=8"]` into a route prefix to limit dict
+        """
+        route_limits = {}
+        for limit in limits:
+            route, _, value = limit.partition("=")
+            route_limits[route.strip()] = int(value)
+        return route_limits
+
+    def _route(self, path: str) -> str | None:
+        matches = [route for route in self.route_limits if path.startswith(route)]
+        return max(matches, key=len) if matches else None
+
+    def _client(self, request: Request) -> str:
+        if self.client_header and (value := request.headers.get(self.client_header)):
+            # Proxies append to X-Forwarded-For, the last hop is the trusted one
+            return value.rsplit(",", 1)[-1].strip()
+        return request.client.host if request.client else ""
+
+    def _bucket(self, client: str) -> TokenBucket:
+        if (bucket := self._buckets.get(client)) is None:
+            if len(self._buckets) >= self.max_clients:
+                self._buckets.popitem(last=False)
+            bucket = TokenBucket(self.client_rate, self.client_burst)
+            self._buckets[client] = bucket
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def _reject(self, reason: str, status_code: int, retry_after: float) -> Response:
+        self.rejected[reason] += 1
+        return JSONResponse(
+            {"message": f"Request rejected ({reason}), retry later"},
+            status_code,
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+        )
+
+    async def __call__(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        path = request.url.path
+        if (
+            self.client_rate > 0
+            and any(path.startswith(route) for route in self.quota_routes)
+            and (retry_after := self._bucket(self._client(request)).take())
+        ):
+            return self._reject("quota", 429, retry_after)
+
+        if (route := self._route(path)) is None:
+            return await call_next(request)
+        if self.lag_threshold > 0 and self.lag_monitor.lag > self.lag_threshold:
+            return self._reject("loop_lag", 503, self.lag_monitor.lag)
+        if (
+            self.pool is not None
+            and self.pool_threshold > 0
+            and self.pool.in_use >= self.pool_threshold
+        ):
+            return self._reject("pool", 503, 1)
+        if self.in_flight[route] >= self.route_limits[route]:
+            return self._reject("concurrency", 503, 1)
+
+        self.in_flight[route] += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight[route] -= 1
+
+        try:
+            response = await call_next(request)
+        except BaseException:
+            release()
+            raise
+
+        # The body is still being produced when call_next returns, the slot is
+        # only free once it has been streamed. The background task covers
+        # clients disconnecting before the body iterator is even started.
+        async def body(iterator: AsyncIterator[bytes] = response.body_iterator):
+            try:
+                async for chunk in iterator:
+                    yield chunk
+            finally:
+                release()
+
+        async def after(background: BackgroundTask | None = response.background):
+            release()
+            if background is not None:
+                await background()
+
+        response.body_iterator = body()
+        response.background = BackgroundTask(after)
+        return response
+
+    def as_dict(self) -> dict:
+        return {
+            "loop_lag_ms": self.lag_monitor.lag * 1000,
+            "max_loop_lag_ms": self.lag_monitor.max_lag * 1000,
+            "pool_in_use": self.pool.in_use if self.pool is not None else None,
+            "in_flight": dict(self.in_flight),
+            "rejected": dict(self.rejected),
+            "clients": len(self._buckets),
+        }
@@ -0,0 +1,63 @@
+from enum import Enum
+
+from fastapi import APIRouter, FastAPI, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from ...utils.assets import (
+    VARIANT_FORMATS,
+    AssetNotFound,
+    AssetUpstreamError,
+    AssetVariantUnsupported,
+    InvalidAssetPath,
+    asset_store,
+)
+
+router = APIRouter(prefix="/asset", tags=["Asset"])
+
+VariantFormat = Enum("VariantFormat", {k: k for k in VARIANT_FORMATS}, type=str)
+
+# Assets are content-addressed, a path never changes its content
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{path:path}")
+async def get_asset(
+    request: Request,
+    path: str,
+    width: int | None = Query(None, ge=16, le=2048),
+    format: VariantFormat | None = None,
+):
+    asset = await asset_store.get_variant(path, width, format and format.value)
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": f'"{asset.digest}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    # Starlette reads the blob in chunks from the threadpool, the ASGI server has
+    # no sendfile support. For zero-copy serving point the reverse proxy at
+    # ASSET_SAVE_DIR/blobs and let it serve the digest from the ETag.
+    return FileResponse(asset.path, media_type=asset.content_type, headers=headers)
+
+
+def init_app(app: FastAPI):
+    app.include_router(router)
+
+    @app.exception_handler(InvalidAssetPath)
+    async def invalid_asset_path_handler(request: Request, exc: InvalidAssetPath):
+        return JSONResponse({"message": exc.message}, 400)
+
+    @app.exception_handler(AssetNotFound)
+    async def asset_not_found_handler(request: Request, exc: AssetNotFound):
+        return JSONResponse({"message": exc.message}, 404)
+
+    @app.exception_handler(AssetUpstreamError)
+    async def asset_upstream_error_handler(request: Request, exc: AssetUpstreamError):
+        return JSONResponse({"message": exc.message}, exc.status_code)
+
+    @app.exception_handler(AssetVariantUnsupported)
+    async def asset_variant_unsupported_handler(
+        request: Request, exc: AssetVariantUnsupported
+    ):
+        return JSONResponse({"message": exc.message}, 501)
+
+    @app.on_event("shutdown")
+    async def close_asset_store():
+        asset_store.close()
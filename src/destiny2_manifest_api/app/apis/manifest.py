@@ -0,0 +1,113 @@
+import asyncio
+import json
+from collections import defaultdict
+
+from fastapi import APIRouter, FastAPI, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ... import config
+from ...utils.constants import CHANGELOG_COLLECTION
+from ...utils.events import manifest_events
+from ..models import mongo
+from ..models.base_model import CannotFindEntity
+
+router = APIRouter(prefix="/manifest", tags=["Manifest"])
+
+
+class ModifiedEntityModel(BaseModel):
+    hash: int | str
+    paths: list[str]
+
+
+class TableChangesModel(BaseModel):
+    added: list[int | str] = []
+    removed: list[int | str] = []
+    modified: list[ModifiedEntityModel] = []
+
+
+class ManifestChangesModel(BaseModel):
+    from_version: str
+    to_version: str
+    tables: dict[str, TableChangesModel]
+
+
+@router.get("/changes", response_model=ManifestChangesModel)
+async def get_manifest_changes(
+    from_version: str | None = Query(None, alias="from"),
+    to_version: str | None = Query(None, alias="to"),
+    table: str | None = None,
+):
+    """
+    Changes between two consecutive imported manifest versions
+
+    Without `to` the latest import is used, without `from` the version it
+    replaced. Changes are recorded per import only, `from` and `to` must be
+    consecutive versions, any other pair is answered with 404.
+    """
+    collection = mongo.db[CHANGELOG_COLLECTION]
+    if not to_version:
+        if doc := await mongo.db["manifest_version"].find_one({"_id": 1}):
+            to_version = doc.get("version")
+    if not from_version:
+        if doc := await collection.find_one({"to": to_version}, {"from": 1}):
+            from_version = doc.get("from")
+
+    filter = {"from": from_version, "to": to_version}
+    if table:
+        filter["table"] = table
+    tables = defaultdict(lambda: defaultdict(list))
+    async for doc in collection.find(filter).sort("chunk"):
+        for key in ("added", "removed", "modified"):
+            tables[doc["table"]][key].extend(doc.get(key, []))
+    if not tables:
+        raise CannotFindEntity(
+            f"Unknown manifest changes <from={from_version}, to={to_version}>"
+        )
+
+    return {"from_version": from_version, "to_version": to_version, "tables": tables}
+
+
+@router.get("/events")
+async def stream_manifest_events(request: Request, lang: str | None = None):
+    """
+    Server-sent events pushed whenever a manifest version has been imported
+
+    Each `version` event carries the language, old and new versions and the
+    tables which changed.
+    """
+
+    async def iter_events():
+        with manifest_events.subscribe() as queue:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), config.MANIFEST_EVENTS_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if lang and event.get("language") != lang:
+                    continue
+                message = f"event: version\ndata: {json.dumps(event)}\n\n"
+                if event_id := event.get("id"):
+                    message = f"id: {event_id}\n{message}"
+                yield message
+
+    return StreamingResponse(
+        iter_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def init_app(app: FastAPI):
+    app.include_router(router)
+
+    @app.on_event("startup")
+    async def start_manifest_events():
+        manifest_events.start()
+
+    @app.on_event("shutdown")
+    async def stop_manifest_events():
+        await manifest_events.stop()
@@ -0,0 +1,157 @@
+from array import array
+from collections import defaultdict
+from enum import Enum
+
+from fastapi import APIRouter, FastAPI, Query
+from pydantic import BaseModel
+
+from ...utils.constants import PERK_INDEX_COLLECTION
+from ...utils.functions import (
+    contains_sorted,
+    intersect_sorted,
+    union_sorted,
+    unpack_hashes,
+)
+from ..models import mongo
+from ..models.base_model import MissingHashOrName
+from ..models.inventory_item import Weapon
+
+router = APIRouter(prefix="/perk", tags=["Perk"])
+
+
+class PerkQueryMode(str, Enum):
+    all = "and"
+    any = "or"
+
+
+class EntityModel(BaseModel):
+    hash: int
+    name: str
+
+
+class PerkWeaponsModel(BaseModel):
+    perks: list[EntityModel]
+    weapons: list[EntityModel]
+
+
+def _merge_terms(terms: list[set[int]]) -> list[set[int]]:
+    """
+    Merge perk terms sharing plugs, e.g. `hash=201&name=Outlaw`
+
+    A single rolled plug has to satisfy all of them, so they are the same perk
+    and must not be placed in different columns.
+    """
+    merged: list[set[int]] = []
+    for plugs in terms:
+        for group in merged:
+            if group & plugs:
+                group &= plugs
+                break
+        else:
+            merged.append(set(plugs))
+    return merged
+
+
+def _rolls_together(term_columns: list[dict[str, list[int]]], weapon_hash: int):
+    """
+    Whether each perk can be rolled in a different socket column of the weapon
+    """
+    options = [
+        [c for c, weapons in columns.items() if contains_sorted(weapons, weapon_hash)]
+        for columns in term_columns
+    ]
+    assigned: dict[str, int] = {}
+
+    def assign(term: int, visited: set[str]) -> bool:
+        # Augmenting path search of a bipartite perk / column matching
+        for column in options[term]:
+            if column in visited:
+                continue
+            visited.add(column)
+            if column not in assigned or assign(assigned[column], visited):
+                assigned[column] = term
+                return True
+        return False
+
+    return all(assign(term, set()) for term in range(len(options)))
+
+
+@router.get("/", response_model=PerkWeaponsModel)
+async def get_weapons_by_perk(
+    hash: list[int] = Query([]),
+    name: list[str] = Query([]),
+    mode: PerkQueryMode = PerkQueryMode.all,
+):
+    """
+    Weapons able to roll all (`mode=and`) or any (`mode=or`) of the given perks
+
+    With `mode=and` the perks must come from different socket columns, so that
+    they can be rolled together. A perk name may match several plugs (e.g.
+    enhanced versions), those count as the same perk, as do a hash and a name
+    resolving to the same plug.
+    """
+    if not hash and not name:
+        raise MissingHashOrName("Must provide at least one perk name or hash")
+
+    # Plugs matched by each perk term, and the weapons of each plug per column
+    terms: dict = {("hash", h): set() for h in hash}
+    terms.update({("name", n): set() for n in name})
+    plug_columns: dict[int, dict[str, array]] = {}
+    perks: list[dict] = []
+    async for doc in mongo.db[PERK_INDEX_COLLECTION].find(
+        {"$or": [{"_id": {"$in": hash}}, {"name": {"$in": name}}]},
+        {"name": 1, "columns": 1},
+    ):
+        perks.append({"hash": doc["_id"], "name": doc.get("name", "")})
+        plug_columns[doc["_id"]] = {
+            column: unpack_hashes(weapons)
+            for column, weapons in doc.get("columns", {}).items()
+        }
+        for key in (("hash", doc["_id"]), ("name", doc.get("name"))):
+            if key in terms:
+                terms[key].add(doc["_id"])
+
+    plug_sets = [plugs for plugs in terms.values() if plugs]
+    if mode == PerkQueryMode.all:
+        plug_sets = _merge_terms(plug_sets) if len(plug_sets) == len(terms) else []
+    term_columns = []
+    for plugs in plug_sets:
+        columns = defaultdict(list)
+        for plug in plugs:
+            for column, weapons in plug_columns[plug].items():
+                columns[column].append(weapons)
+        term_columns.append(
+            {column: union_sorted(*weapons) for column, weapons in columns.items()}
+        )
+    matches = [union_sorted(*columns.values()) for columns in term_columns]
+    if not matches:
+        weapon_hashes = []
+    elif mode == PerkQueryMode.all:
+        # Start from the rarest perk so that intermediate results stay small
+        matches.sort(key=len)
+        weapon_hashes = matches[0]
+        for match in matches[1:]:
+            weapon_hashes = intersect_sorted(weapon_hashes, match)
+        if len(term_columns) > 1:
+            weapon_hashes = [
+                weapon_hash
+                for weapon_hash in weapon_hashes
+                if _rolls_together(term_columns, weapon_hash)
+            ]
+    else:
+        weapon_hashes = union_sorted(*matches)
+
+    weapons = [
+        {
+            "hash": doc["_id"],
+            "name": doc["json"].get("displayProperties", {}).get("name", ""),
+        }
+        async for doc in mongo.db[Weapon.__collection_name__].find(
+            {"_id": {"$in": weapon_hashes}}, {"json.displayProperties.name": 1}
+        )
+    ]
+    return {"perks": perks, "weapons": weapons}
+
+
+def init_app(app: FastAPI):
+    app.include_router(router)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, FastAPI, Request
+
+from ...utils.assets import asset_store
+from ...utils.cache import negative_cache, single_flight
+from ...utils.logging import get_pipeline
+from ..models import mongo
+
+router = APIRouter(prefix="/status", tags=["Status"])
+
+
+@router.get("/")
+async def get_status(request: Request):
+    status = {
+        "mongo": mongo.manager.metrics(),
+        "single_flight": single_flight.as_dict(),
+        "asset_single_flight": asset_store.single_flight.as_dict(),
+        "negative_cache": negative_cache.as_dict(),
+        "logging": get_pipeline().as_dict(),
+    }
+    if admission := getattr(request.app.state, "admission", None):
+        status["admission"] = admission.as_dict()
+    return status
+
+
+def init_app(app: FastAPI):
+    app.include_router(router)
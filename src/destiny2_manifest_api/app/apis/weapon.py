@@ -1,9 +1,35 @@
-from fastapi import APIRouter, FastAPI
+import json
+from enum import Enum
+
+from fastapi import APIRouter, FastAPI, Query
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCursor
 from pydantic import BaseModel
+from pymongo import ASCENDING
 
+from ... import config
+from ...utils.cache import single_flight
+from ...utils.constants import AMMO_TYPE_MAPPING, DAMAGE_TYPE_MAPPING, TIER_TYPE_MAPPING
+from ...utils.profiling import current_trace, span
+from ..models import dbname, mongo
 from ..models.inventory_item import Weapon
 
 router = APIRouter(prefix="/weapon", tags=["Weapon"])
+list_router = APIRouter(prefix="/weapons", tags=["Weapon"])
+
+TierType = Enum("TierType", {k: k for k in TIER_TYPE_MAPPING}, type=str)
+DamageType = Enum("DamageType", {k: k for k in DAMAGE_TYPE_MAPPING}, type=str)
+AmmoType = Enum("AmmoType", {k: k for k in AMMO_TYPE_MAPPING}, type=str)
+
+
+class ListFormat(str, Enum):
+    json = "json"
+    ndjson = "ndjson"
+
+
+FIELDS_DESCRIPTION = (
+    f"Comma separated fields to resolve, one of: {', '.join(Weapon.FIELDS)}"
+)
 
 
 class WeaponModel(BaseModel):
@@ -11,20 +37,112 @@ class WeaponModel(BaseModel):
     name: str | None
     year: int | None
     season: int | None
-    stats: dict
-    sockets: dict
+    stats: dict | None
+    sockets: dict | None
+
+
+class WeaponSummaryModel(BaseModel):
+    hash: int
+    name: str
+    year: int | None
+    season: int | None
+    tier: str | None
+    damage_type: str | None
+    ammo_type: str | None
+    item_categories: list[int]
+
+
+class WeaponListModel(BaseModel):
+    items: list[WeaponSummaryModel]
+    next: int | None
 
 
-@router.get("/", response_model=WeaponModel)
+@router.get("/", response_model=WeaponModel, response_model_exclude_unset=True)
 async def get_weapon(
     hash: int | None = None,
     name: str | None = None,
     year: int | None = None,
     season: int | None = None,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
 ):
-    weapon: Weapon = await Weapon(hash=hash, name=name, year=year, season=season)
-    return await weapon.as_dict()
+    parsed_fields = Weapon.parse_fields(fields)
+
+    async def resolve() -> dict:
+        weapon: Weapon = await Weapon(
+            hash=hash,
+            name=name,
+            year=year,
+            season=season,
+            fields=parsed_fields,
+        )
+        with span("Weapon.as_dict"):
+            return await weapon.as_dict()
+
+    if current_trace.get():
+        # Profile this request's own resolution rather than a shared one
+        return await resolve()
+    key = (
+        "weapon",
+        dbname.get(),
+        hash,
+        name,
+        year,
+        season,
+        parsed_fields and frozenset(parsed_fields),
+    )
+    return await single_flight.do(key, resolve)
+
+
+@list_router.get("/", response_model=WeaponListModel)
+async def list_weapons(
+    year: int | None = None,
+    season: int | None = None,
+    item_category: int | None = None,
+    tier: TierType | None = None,
+    damage_type: DamageType | None = None,
+    ammo_type: AmmoType | None = None,
+    after: int | None = Query(None, description="Hash of the last item of a page"),
+    limit: int = Query(50, ge=1, le=500),
+    format: ListFormat = ListFormat.json,
+    batch_size: int = Query(config.WEAPON_LIST_BATCH_SIZE, ge=1, le=10000),
+):
+    """
+    Weapons are ordered by hash, pass `next` of a page as `after` to get the
+    following one. With `format=ndjson` every matching weapon after `after` is
+    streamed, one JSON document per line, and `limit` is ignored.
+    """
+    query = Weapon.gen_list_query(
+        year=year,
+        season=season,
+        item_category=item_category,
+        tier=tier and tier.value,
+        damage_type=damage_type and damage_type.value,
+        ammo_type=ammo_type and ammo_type.value,
+    )
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    cursor: AsyncIOMotorCursor = (
+        mongo.db[Weapon.__collection_name__]
+        .find(query, Weapon.SUMMARY_PROJECTION)
+        .sort("_id", ASCENDING)
+        .batch_size(batch_size)
+    )
+
+    if format == ListFormat.ndjson:
+
+        async def iter_ndjson():
+            async for doc in cursor:
+                yield json.dumps(Weapon.summarize(doc), ensure_ascii=False) + "\n"
+
+        return StreamingResponse(iter_ndjson(), media_type="application/x-ndjson")
+
+    items = [Weapon.summarize(doc) async for doc in cursor.limit(limit)]
+    return {
+        "items": items,
+        "next": items[-1]["hash"] if len(items) == limit else None,
+    }
 
 
 def init_app(app: FastAPI):
     app.include_router(router)
+    app.include_router(list_router)
@@ -1,7 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorCollection
 from pymongo import DESCENDING
+
+from ... import config
+from ...utils.cache import negative_cache
 from ...utils.functions import aobject
-from . import mongo
+from ...utils.profiling import traced_query
+from ...utils.snapshot import Snapshot, snapshots
+from . import dbname, mongo
+
+# A new snapshot means a new manifest version, misses may have become hits
+snapshots.swap_callbacks.append(negative_cache.clear)
 
 
 class UnknownCollectionName(Exception):
@@ -22,8 +30,16 @@ class CannotFindEntity(Exception):
         super().__init__(message)
 
 
+class InvalidField(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
 class BaseModel(aobject):
     __collection_name__: str = ""
+    # Top-level keys of `json` to fetch, empty means the whole document
+    __projection__: tuple[str, ...] = ()
 
     collection: AsyncIOMotorCollection
     hash: int | None
@@ -36,6 +52,7 @@ class BaseModel(aobject):
         name: str = "",
         *,
         additional_queries: dict = {},
+        projection: tuple[str, ...] | None = None,
     ):
         if not self.__collection_name__:
             raise UnknownCollectionName("Unknown collection name.")
@@ -55,18 +72,60 @@ class BaseModel(aobject):
             )
         if additional_queries:
             filter = {**filter, **additional_queries}
-        _raw: dict = await self.collection.find_one(
-            filter, sort=[("json.index", DESCENDING)]
+
+        miss_key = (
+            dbname.get(),
+            self.__collection_name__,
+            self.hash,
+            self.name,
+            repr(additional_queries),
         )
+        if miss_key in negative_cache:
+            self._raise_not_found()
+
+        _raw: dict | None
+        if self.hash and not additional_queries and (snapshot := self._snapshot()):
+            with traced_query("snapshot", self.__collection_name__, filter):
+                record = snapshot.get(self.__collection_name__, self.hash)
+            _raw = record and {"_id": self.hash, "json": record}
+        else:
+            if projection is None:
+                projection = self.__projection__
+            if projection:
+                projection = {
+                    f"json.{field}": 1 for field in ("displayProperties", *projection)
+                }
+            else:
+                projection = None
+            with traced_query("find_one", self.__collection_name__, filter):
+                _raw = await self.collection.find_one(
+                    filter, projection, sort=[("json.index", DESCENDING)]
+                )
         if not _raw:
-            raise CannotFindEntity(
-                f"Unknown {self.__class__.__name__} <name={self.name}, hash={self.hash}>"
-            )
+            negative_cache.add(miss_key)
+            self._raise_not_found()
 
         self.hash = _raw.get("_id", None)
         self.name = _raw.get("json", {}).get("displayProperties", {}).get("name", "")
         self.raw = _raw.get("json", {})
 
+    def _raise_not_found(self):
+        raise CannotFindEntity(
+            f"Unknown {self.__class__.__name__} <name={self.name}, hash={self.hash}>"
+        )
+
+    def _snapshot(self) -> Snapshot | None:
+        """
+        Compiled snapshot holding this collection, lookups by hash are served
+        from it instead of MongoDB
+        """
+        if not config.SNAPSHOT_ENABLED:
+            return None
+        snapshot = snapshots.get(dbname.get())
+        if snapshot and self.__collection_name__ in snapshot:
+            return snapshot
+        return None
+
     def __getattr__(self, attr):
         if attr in self.raw.keys():
             return self.raw[attr]
@@ -1,8 +1,15 @@
 from collections import defaultdict
 
-from ...utils.constants import WATERMARK_SEASON_MAPPING, YEAR_SEASON_MAPPING
+from ...utils.constants import (
+    AMMO_TYPE_MAPPING,
+    DAMAGE_TYPE_MAPPING,
+    SOCKET_CATEGORY_MAPPING,
+    TIER_TYPE_MAPPING,
+    WATERMARK_SEASON_MAPPING,
+    YEAR_SEASON_MAPPING,
+)
 from ...utils.functions import aobject
-from .base_model import BaseModel
+from .base_model import BaseModel, InvalidField
 
 
 class InventoryItem(BaseModel):
@@ -22,36 +29,66 @@ from .stat import Stat
 
 
 class SocketInstance(aobject):
-    async def __init__(self, **kwargs):
+    async def __init__(
+        self, *, plug_projection: tuple[str, ...] | None = None, **kwargs
+    ):
         if initial_item_hash := kwargs.get("singleInitialItemHash"):
-            self.initial_item: Plug = await Plug(hash=initial_item_hash)
+            self.initial_item: Plug = await Plug(
+                hash=initial_item_hash, projection=plug_projection
+            )
         else:
             self.initial_item = None
 
         if plug_set_hash := kwargs.get("randomizedPlugSetHash"):
+            plug_set: PlugSet = await PlugSet(hash=plug_set_hash)
             self.possible_items: list[Plug] = [
-                plug async for plug in await PlugSet(hash=plug_set_hash)
+                plug async for plug in plug_set.plugs(plug_projection)
             ]
         else:
             self.possible_items = None
 
         if plug_set_hash := kwargs.get("reusablePlugSetHash"):
+            plug_set: PlugSet = await PlugSet(hash=plug_set_hash)
             self.fixed_items: list[Plug] = [
-                plug async for plug in await PlugSet(hash=plug_set_hash)
+                plug async for plug in plug_set.plugs(plug_projection)
             ]
         else:
             self.fixed_items = None
 
 
 class Socket(aobject):
-    async def __init__(self, category_hash, socket_entry_list):
+    async def __init__(
+        self,
+        category_hash,
+        socket_entry_list,
+        *,
+        plug_projection: tuple[str, ...] | None = None,
+    ):
         self.category: SocketCategory = await SocketCategory(hash=category_hash)
         self.socket_instances: list[SocketInstance] = []
         for s in socket_entry_list:
-            self.socket_instances.append(await SocketInstance(**s))
+            self.socket_instances.append(
+                await SocketInstance(plug_projection=plug_projection, **s)
+            )
 
 
 class Weapon(InventoryItem):
+    DEFAULT_FIELDS = ("hash", "name", "year", "season", "stats", "sockets")
+    FIELDS = (
+        *DEFAULT_FIELDS,
+        *(f"sockets.{category}" for category in SOCKET_CATEGORY_MAPPING),
+        "plug.stats",
+    )
+
+    SUMMARY_PROJECTION = {
+        "json.displayProperties.name": 1,
+        "json.iconWatermark": 1,
+        "json.inventory.tierTypeHash": 1,
+        "json.defaultDamageType": 1,
+        "json.equippingBlock.ammoType": 1,
+        "json.itemCategoryHashes": 1,
+    }
+
     async def __init__(
         self,
         hash: int | None = None,
@@ -59,9 +96,11 @@ class Weapon(InventoryItem):
         *,
         year: int | None = None,
         season: int | None = None,
+        fields: set[str] | None = None,
     ):
         self.year = year
         self.season = season
+        self.fields = set(self.DEFAULT_FIELDS) if fields is None else fields
         if self.year or self.season:
             additional_queries = self._gen_additional_queries()
         else:
@@ -71,43 +110,155 @@ class Weapon(InventoryItem):
             hash,
             name,
             additional_queries=additional_queries,
+            projection=self._gen_projection(),
         )
         self._get_season_by_watermark()
         self._get_year_by_season()
 
+    @classmethod
+    def parse_fields(cls, fields: str | None) -> set[str] | None:
+        """
+        Parse a comma separated `fields` parameter, e.g. `name,stats,sockets.perks`
+        """
+        if not fields:
+            return None
+        parsed = {field.strip() for field in fields.split(",") if field.strip()}
+        if unknown := parsed - set(cls.FIELDS):
+            raise InvalidField(
+                f"Unknown fields {sorted(unknown)} for {cls.__name__}, "
+                f"available fields: {list(cls.FIELDS)}"
+            )
+        if "plug.stats" in parsed and not any(
+            field == "sockets" or field.startswith("sockets.") for field in parsed
+        ):
+            raise InvalidField(
+                "Field plug.stats requires sockets or one of sockets.<category>"
+            )
+        return parsed
+
+    def _gen_projection(self) -> tuple[str, ...]:
+        projection = ["iconWatermark", "inventory"]
+        if "stats" in self.fields:
+            projection.append("stats")
+        if self._socket_category_hashes() != []:
+            projection.append("sockets")
+        return tuple(projection)
+
+    def _socket_category_hashes(self) -> list[int] | None:
+        """
+        Socket categories requested by `fields`, `None` means all of them
+        """
+        if "sockets" in self.fields:
+            return None
+        return [
+            category_hash
+            for category, category_hash in SOCKET_CATEGORY_MAPPING.items()
+            if f"sockets.{category}" in self.fields
+        ]
+
     def _get_season_by_watermark(self):
-        if watermark := self.iconWatermark:
-            self.season = WATERMARK_SEASON_MAPPING.get(watermark)
+        if season := self.season_by_watermark(self.iconWatermark):
+            self.season = season
 
     def _get_year_by_season(self):
-        if year := [y for y, s in YEAR_SEASON_MAPPING.items() if self.season in s]:
-            self.year = year[0]
+        if year := self.year_by_season(self.season):
+            self.year = year
 
     def _gen_additional_queries(self):
+        return self.gen_additional_queries(self.year, self.season)
+
+    @staticmethod
+    def season_by_watermark(watermark: str | None) -> int | None:
+        return WATERMARK_SEASON_MAPPING.get(watermark) if watermark else None
+
+    @staticmethod
+    def year_by_season(season: int | None) -> int | None:
+        if year := [y for y, s in YEAR_SEASON_MAPPING.items() if season in s]:
+            return year[0]
+        return None
+
+    @classmethod
+    def gen_additional_queries(cls, year: int | None, season: int | None) -> dict:
         additional_queries: dict = {"json.itemCategoryHashes": 1}
-        if self.year == 1:
-            if self.season == 1:
+        if year == 1:
+            if season == 1:
                 additional_queries["json.iconWatermark"] = {"$exists": False}
             else:
-                additional_queries[
-                    "$or" : [
-                        {"json.iconWatermark": {"$exists": False}},
-                        {"json.iconWatermark": {"$in": self._get_watermarks()}},
-                    ]
+                additional_queries["$or"] = [
+                    {"json.iconWatermark": {"$exists": False}},
+                    {"json.iconWatermark": {"$in": cls._get_watermarks(year, season)}},
                 ]
         else:
-            additional_queries["json.iconWatermark"] = {"$in": self._get_watermarks()}
+            additional_queries["json.iconWatermark"] = {
+                "$in": cls._get_watermarks(year, season)
+            }
         return additional_queries
 
-    def _get_watermarks(self) -> list[str]:
+    @classmethod
+    def gen_list_query(
+        cls,
+        *,
+        year: int | None = None,
+        season: int | None = None,
+        item_category: int | None = None,
+        tier: str | None = None,
+        damage_type: str | None = None,
+        ammo_type: str | None = None,
+    ) -> dict:
+        """
+        Build the filter used to enumerate weapons, see `GET /weapons`
+        """
+        if year or season:
+            query = cls.gen_additional_queries(year, season)
+        else:
+            query = {"json.itemCategoryHashes": 1}
+        if item_category:
+            query["json.itemCategoryHashes"] = {"$all": [1, item_category]}
+        if tier:
+            query["json.inventory.tierTypeHash"] = TIER_TYPE_MAPPING[tier]
+        if damage_type:
+            query["json.defaultDamageType"] = DAMAGE_TYPE_MAPPING[damage_type]
+        if ammo_type:
+            query["json.equippingBlock.ammoType"] = AMMO_TYPE_MAPPING[ammo_type]
+        return query
+
+    @classmethod
+    def summarize(cls, doc: dict) -> dict:
+        """
+        Cheap representation of a raw weapon document, no extra lookups needed
+        """
+        raw: dict = doc.get("json", {})
+        season = cls.season_by_watermark(raw.get("iconWatermark"))
+        tier_hash = raw.get("inventory", {}).get("tierTypeHash")
+        damage_type = raw.get("defaultDamageType")
+        ammo_type = raw.get("equippingBlock", {}).get("ammoType")
+        return {
+            "hash": doc.get("_id"),
+            "name": raw.get("displayProperties", {}).get("name", ""),
+            "year": cls.year_by_season(season),
+            "season": season,
+            "tier": next(
+                (k for k, v in TIER_TYPE_MAPPING.items() if v == tier_hash), None
+            ),
+            "damage_type": next(
+                (k for k, v in DAMAGE_TYPE_MAPPING.items() if v == damage_type), None
+            ),
+            "ammo_type": next(
+                (k for k, v in AMMO_TYPE_MAPPING.items() if v == ammo_type), None
+            ),
+            "item_categories": raw.get("itemCategoryHashes", []),
+        }
+
+    @staticmethod
+    def _get_watermarks(year: int | None, season: int | None) -> list[str]:
         watermarks: list[str] = []
-        if self.season:
+        if season:
             watermarks = [
-                wm for wm, ss in WATERMARK_SEASON_MAPPING.items() if ss == self.season
+                wm for wm, ss in WATERMARK_SEASON_MAPPING.items() if ss == season
             ]
             return watermarks
-        if self.year:
-            seasons = YEAR_SEASON_MAPPING.get(self.year)
+        if year:
+            seasons = YEAR_SEASON_MAPPING.get(year, [])
             watermarks = [
                 wm for wm, ss in WATERMARK_SEASON_MAPPING.items() if ss in seasons
             ]
@@ -118,11 +269,24 @@ class Weapon(InventoryItem):
         if sockets := self.raw.get("sockets"):
             sockets: dict
             socket_dict: dict[str, list[SocketInstance]] = {}
+            category_hashes = self._socket_category_hashes()
+            plug_projection = (
+                ("investmentStats",)
+                if "plug.stats" in self.fields
+                else ("displayProperties",)
+            )
             for category in sockets.get("socketCategories"):
                 category: dict
-                # Skip decorators and masterworks on Legendary weapons
                 if (
-                    category.get("socketCategoryHash") in [2048875504, 2685412949]
+                    category_hashes is not None
+                    and category.get("socketCategoryHash") not in category_hashes
+                ):
+                    continue
+                # Skip decorators and masterworks on Legendary weapons, unless
+                # they were asked for explicitly with `sockets.<category>`
+                if (
+                    category_hashes is None
+                    and category.get("socketCategoryHash") in [2048875504, 2685412949]
                     and self.inventory.get("tierTypeHash") == 4008398120
                 ):
                     continue
@@ -132,7 +296,9 @@ class Weapon(InventoryItem):
                     if idx in category.get("socketIndexes", [])
                 ]
                 _socket: Socket = await Socket(
-                    category.get("socketCategoryHash", ""), socket_entry_list
+                    category.get("socketCategoryHash", ""),
+                    socket_entry_list,
+                    plug_projection=plug_projection,
                 )
                 socket_dict[_socket.category.name] = _socket.socket_instances
 
@@ -153,25 +319,40 @@ class Weapon(InventoryItem):
         else:
             return None
 
+    async def _plug_as_dict(self, plug: Plug) -> str | dict:
+        if "plug.stats" not in self.fields:
+            return plug.name
+        return {
+            "name": plug.name,
+            "stats": {
+                plug_stat.stat.name: plug_stat.value for plug_stat in await plug.stats
+            },
+        }
+
     async def as_dict(self) -> dict:
+        result = {}
+        for field in ("hash", "name", "year", "season"):
+            if field in self.fields:
+                result[field] = getattr(self, field)
+        if "stats" in self.fields:
+            result["stats"] = await self.stats
+        if self._socket_category_hashes() == []:
+            return result
+
         sockets = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        for key, socket_list in (await self.sockets).items():
+        for key, socket_list in ((await self.sockets) or {}).items():
             for index, socket in enumerate(socket_list):
                 for attr in vars(socket).keys():
                     if (plugs := getattr(socket, attr, None)) is not None:
                         plugs: Plug | list[Plug]
                         if isinstance(plugs, Plug):
-                            sockets[key][index][attr].append(plugs.name)
+                            sockets[key][index][attr].append(
+                                await self._plug_as_dict(plugs)
+                            )
                         else:
-                            [
-                                sockets[key][index][attr].append(plug.name)
-                                for plug in plugs
-                            ]
-        return {
-            "hash": self.hash,
-            "name": self.name,
-            "year": self.year,
-            "season": self.season,
-            "stats": await self.stats,
-            "sockets": sockets,
-        }
+                            for plug in plugs:
+                                sockets[key][index][attr].append(
+                                    await self._plug_as_dict(plug)
+                                )
+        result["sockets"] = sockets
+        return result
@@ -19,6 +19,7 @@ from .inventory_item import InventoryItem
 
 
 class Plug(InventoryItem):
+    __projection__ = ("investmentStats",)
     name: str
     investmentStats: list[dict]
 
@@ -26,14 +27,17 @@ class Plug(InventoryItem):
     async def stats(self) -> list[PlugStat]:
         return [
             await PlugStat(invstat.get("statTypeHash"), invstat.get("value"))
-            for invstat in self.investmentStats
-            if self.investmentStats
+            for invstat in self.investmentStats or []
         ]
 
 
 class PlugSet(BaseModel):
     __collection_name__ = "DestinyPlugSetDefinition"
+    __projection__ = ("reusablePlugItems",)
 
-    async def __aiter__(self):
-        for plug in self.reusablePlugItems:
-            yield await Plug(hash=plug.get("plugItemHash"))
+    async def plugs(self, projection: tuple[str, ...] | None = None):
+        for plug in self.reusablePlugItems or []:
+            yield await Plug(hash=plug.get("plugItemHash"), projection=projection)
+
+    def __aiter__(self):
+        return self.plugs()
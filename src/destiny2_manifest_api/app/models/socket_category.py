@@ -3,4 +3,5 @@ from .base_model import BaseModel
 
 class SocketCategory(BaseModel):
     __collection_name__ = "DestinySocketCategoryDefinition"
+    __projection__ = ("displayProperties",)
     name: str
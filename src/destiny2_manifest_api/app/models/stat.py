@@ -3,3 +3,4 @@ from .base_model import BaseModel
 
 class Stat(BaseModel):
     __collection_name__ = "DestinyStatDefinition"
+    __projection__ = ("displayProperties",)
@@ -0,0 +1,121 @@
+import json
+import random
+import re
+from datetime import datetime
+from pathlib import Path
+from secrets import compare_digest
+from typing import AsyncIterator, Awaitable, Callable
+
+import aiofiles
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+
+from ..utils.profiling import Trace, current_trace
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand
+
+    Admins trigger it with `X-Profile: return` (the report replaces the
+    response) or `X-Profile: store` plus a matching `X-Admin-Token` header,
+    otherwise requests are sampled at `sample_rate` and their reports stored.
+    Stored reports are named in the `X-Profile-Report` response header, only
+    the latest `max_reports` are kept. Reports cover streaming the body, so
+    `X-Profile: return` must not be used on endless streams such as
+    `/manifest/events`.
+    """
+
+    def __init__(
+        self,
+        *,
+        admin_token: str,
+        sample_rate: float,
+        sample_interval: float,
+        directory: Path,
+        max_reports: int = 200,
+    ) -> None:
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.sample_interval = sample_interval
+        self.directory = directory
+        self.max_reports = max_reports
+
+    def _mode(self, request: Request) -> str | None:
+        mode = request.headers.get("x-profile")
+        if mode in ("return", "store") and self.admin_token:
+            token = request.headers.get("x-admin-token", "")
+            if compare_digest(token.encode(), self.admin_token.encode()):
+                return mode
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "store"
+        return None
+
+    def _filename(self, trace: Trace) -> str:
+        slug = re.sub(r"[^\w-]+", "_", trace.name).strip("_")
+        return f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}.speedscope.json"
+
+    async def _store(self, filename: str, report: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(self.directory / filename, "w") as f:
+            await f.write(json.dumps(report))
+        if self.max_reports > 0:
+            # Names start with a timestamp, keep the latest reports only
+            reports = sorted(self.directory.glob("*.speedscope.json"))
+            for path in reports[: -self.max_reports]:
+                path.unlink(missing_ok=True)
+
+    async def __call__(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        if (mode := self._mode(request)) is None:
+            return await call_next(request)
+
+        trace = Trace(f"{request.method} {request.url.path}", self.sample_interval)
+        token = current_trace.set(trace)
+        trace.start()
+        try:
+            response = await call_next(request)
+        except BaseException:
+            trace.stop()
+            raise
+        finally:
+            current_trace.reset(token)
+
+        # The body is produced after call_next returns, the trace covers it too
+        if mode == "return":
+            try:
+                async for _ in response.body_iterator:
+                    pass
+            finally:
+                trace.stop()
+            return JSONResponse(trace.as_speedscope())
+
+        filename = self._filename(trace)
+        finished = False
+
+        async def finish() -> None:
+            nonlocal finished
+            if not finished:
+                finished = True
+                trace.stop()
+                await self._store(filename, trace.as_speedscope())
+
+        async def body(iterator: AsyncIterator[bytes] = response.body_iterator):
+            try:
+                async for chunk in iterator:
+                    yield chunk
+            finally:
+                await finish()
+
+        async def after(background: BackgroundTask | None = response.background):
+            # Clients disconnecting before the body is started
+            await finish()
+            if background is not None:
+                await background()
+
+        response.body_iterator = body()
+        response.background = BackgroundTask(after)
+        response.headers["X-Profile-Report"] = filename
+        return response
@@ -18,6 +18,19 @@ DEBUG: bool = config("DEBUG", cast=bool, default=False)
 SECRET_KEY: Secret = config("SECRET_KEY", cast=Secret, default=token_urlsafe(64))
 LOG_LEVEL = config("LOG_LEVEL", cast=logging.getLevelName, default="INFO")
 LOG_FILE_PATH: Path = config("LOG_FILE_PATH", cast=Path, default=BASE_DIR / "log")
+LOG_BUFFER_SIZE: int = config("LOG_BUFFER_SIZE", cast=int, default="10000")
+LOG_BATCH_SIZE: int = config("LOG_BATCH_SIZE", cast=int, default="500")
+LOG_FLUSH_INTERVAL: float = config("LOG_FLUSH_INTERVAL", cast=float, default="0.5")
+# Records per second allowed for each logging call site, 0 disables sampling
+LOG_RATE_LIMIT: float = config("LOG_RATE_LIMIT", cast=float, default="10")
+LOG_RATE_BURST: int = config("LOG_RATE_BURST", cast=int, default="50")
+ADMIN_TOKEN: Secret = config("ADMIN_TOKEN", cast=Secret, default="")
+PROFILE_SAMPLE_RATE: float = config("PROFILE_SAMPLE_RATE", cast=float, default="0")
+PROFILE_SAMPLE_INTERVAL: float = config(
+    "PROFILE_SAMPLE_INTERVAL", cast=float, default="0.001"
+)
+# Stored reports kept under LOG_FILE_PATH/profiles, 0 keeps all of them
+PROFILE_MAX_REPORTS: int = config("PROFILE_MAX_REPORTS", cast=int, default="200")
 
 MANIFEST_SAVE_DIR: Path = config(
     "MANIFEST_SAVE_DIR", cast=Path, default=BASE_DIR / "manifest"
@@ -26,10 +39,57 @@ MANIFEST_LANG: list = config(
     "MANIFEST_LANG", cast=CommaSeparatedStrings, default="zh-cht"
 )
 MANIFEST_DB_PREFIX: str = config("MANIFEST_DB_PREFIX", default="destiny2_manifest")
+SNAPSHOT_ENABLED: bool = config("SNAPSHOT_ENABLED", cast=bool, default=True)
+SNAPSHOT_CHECK_INTERVAL: float = config(
+    "SNAPSHOT_CHECK_INTERVAL", cast=float, default="5"
+)
+ADMISSION_ENABLED: bool = config("ADMISSION_ENABLED", cast=bool, default=True)
+ADMISSION_ROUTE_LIMITS: list = config(
+    "ADMISSION_ROUTE_LIMITS",
+    cast=CommaSeparatedStrings,
+    default="/weapon/=64,/weapons/=8,/perk/=64,/asset/=32",
+)
+ADMISSION_LOOP_LAG_THRESHOLD: float = config(
+    "ADMISSION_LOOP_LAG_THRESHOLD", cast=float, default="0.25"
+)
+# Share of the serving pool in use at which expensive routes are shed, 0 disables
+ADMISSION_POOL_THRESHOLD: float = config(
+    "ADMISSION_POOL_THRESHOLD", cast=float, default="0.9"
+)
+ADMISSION_CLIENT_RATE: float = config("ADMISSION_CLIENT_RATE", cast=float, default="20")
+ADMISSION_CLIENT_BURST: int = config("ADMISSION_CLIENT_BURST", cast=int, default="40")
+# Routes subject to the per-client quota, cached assets are cheap enough to skip
+ADMISSION_QUOTA_ROUTES: list = config(
+    "ADMISSION_QUOTA_ROUTES",
+    cast=CommaSeparatedStrings,
+    default="/weapon/,/weapons/,/perk/",
+)
+# e.g. X-Forwarded-For behind a trusted proxy, its last entry keys the quota
+ADMISSION_CLIENT_HEADER: str = config("ADMISSION_CLIENT_HEADER", default="")
+MANIFEST_EVENTS_BACKEND: str = config("MANIFEST_EVENTS_BACKEND", default="mongo")
+MANIFEST_EVENTS_KEEPALIVE: float = config(
+    "MANIFEST_EVENTS_KEEPALIVE", cast=float, default="15"
+)
+# Misses are dropped on import and on snapshot swap. Workers which did not run the
+# import and have SNAPSHOT_ENABLED=false keep stale misses for up to this long.
+NEGATIVE_CACHE_TTL: float = config("NEGATIVE_CACHE_TTL", cast=float, default="30")
+NEGATIVE_CACHE_SIZE: int = config("NEGATIVE_CACHE_SIZE", cast=int, default="10000")
+WEAPON_LIST_BATCH_SIZE: int = config("WEAPON_LIST_BATCH_SIZE", cast=int, default="500")
 
 BUNGIE_API_HOST: str = config("BUNGIE_API_HOST", default="https://www.bungie.net")
 BUNGIE_API_ROOT: str = config("BUNGIE_API_ROOT", default=f"{BUNGIE_API_HOST}/Platform")
 BUNGIE_API_KEY: Secret = config("BUNGIE_API_KEY", cast=Secret)
+BUNGIE_ASSET_HOST: str = config("BUNGIE_ASSET_HOST", default=BUNGIE_API_HOST)
+HTTP_TIMEOUT: float = config("HTTP_TIMEOUT", cast=float, default="30")
+
+ASSET_SAVE_DIR: Path = config(
+    "ASSET_SAVE_DIR", cast=Path, default=MANIFEST_SAVE_DIR / "assets"
+)
+ASSET_WORKERS: int = config("ASSET_WORKERS", cast=int, default="2")
+ASSET_PREFETCH: bool = config("ASSET_PREFETCH", cast=bool, default=True)
+ASSET_PREFETCH_CONCURRENCY: int = config(
+    "ASSET_PREFETCH_CONCURRENCY", cast=int, default="8"
+)
 
 MONGO_HOST: str = config("MONGO_HOST", default="localhost")
 MONGO_PORT: int = config("MONGO_PORT", cast=int, default="27017")
@@ -39,6 +99,24 @@ MONGO_URI: str = (
     f"mongodb://{MONGO_USERNAME}:{str(MONGO_PASSWORD)}@"
     f"{MONGO_HOST}:{MONGO_PORT}/?authSource=admin"
 )
+MONGO_COMPRESSORS: str = config("MONGO_COMPRESSORS", default="zlib")
+MONGO_READ_PREFERENCE: str = config(
+    "MONGO_READ_PREFERENCE", default="secondaryPreferred"
+)
+MONGO_SERVING_MAX_POOL_SIZE: int = config(
+    "MONGO_SERVING_MAX_POOL_SIZE", cast=int, default="100"
+)
+MONGO_SERVING_MIN_POOL_SIZE: int = config(
+    "MONGO_SERVING_MIN_POOL_SIZE", cast=int, default="10"
+)
+MONGO_IMPORT_MAX_POOL_SIZE: int = config(
+    "MONGO_IMPORT_MAX_POOL_SIZE", cast=int, default="8"
+)
+MONGO_IMPORT_WRITE_CONCERN: str = config("MONGO_IMPORT_WRITE_CONCERN", default="1")
+MONGO_SYNC_MAX_POOL_SIZE: int = config(
+    "MONGO_SYNC_MAX_POOL_SIZE", cast=int, default="4"
+)
 
 LOG_FILE_PATH.mkdir(parents=True, exist_ok=True)
 MANIFEST_SAVE_DIR.mkdir(parents=True, exist_ok=True)
+ASSET_SAVE_DIR.mkdir(parents=True, exist_ok=True)
@@ -4,16 +4,15 @@ import tzlocal
 from apscheduler.executors.asyncio import AsyncIOExecutor
 from apscheduler.jobstores.mongodb import MongoDBJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from pymongo.mongo_client import MongoClient
 
-from ..config import MANIFEST_LANG, MONGO_URI
+from ..config import MANIFEST_LANG
 from ..utils.logging import create_logger
+from ..utils.mongo import mongo_manager
 
 logger = create_logger("destiny_manifest_api.task", "task.log")
 
 
-mongo = MongoClient(MONGO_URI)
-jobstores = {"default": MongoDBJobStore(client=mongo)}
+jobstores = {"default": MongoDBJobStore(client=mongo_manager.sync)}
 executors = {"default": AsyncIOExecutor()}
 job_defaults = {"coalesce": False, "max_instances": 4}
 scheduler = AsyncIOScheduler(
@@ -1,16 +1,34 @@
 import json
 import zipfile
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 from typing import AsyncGenerator
 
 import aiofiles
 import aiosqlite
-from httpx import AsyncClient, Response
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from httpx import Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from .. import config
-from ..utils.functions import aobject, api_request, async_wrap
+from ..utils.assets import asset_store
+from ..utils.cache import negative_cache
+from ..utils.constants import (
+    CHANGELOG_COLLECTION,
+    PERK_INDEX_COLLECTION,
+    SNAPSHOT_FIELDS,
+)
+from ..utils.events import manifest_events
+from ..utils.functions import (
+    aobject,
+    api_request,
+    async_wrap,
+    diff_paths,
+    http_client,
+    pack_hashes,
+)
+from ..utils.mongo import mongo_manager
+from ..utils.snapshot import SnapshotWriter, snapshots
 from . import logger
 
 
@@ -18,6 +36,7 @@ class Manifest(aobject):
     async def __init__(self, language) -> None:
         self.language = language
         self.version = ""
+        self.previous_version: str | None = None
         self.manifest_origin_path = ""
         self.manifest_download_dir = config.MANIFEST_SAVE_DIR / "zip"
         self.manifest_download_dir.mkdir(0o755, parents=True, exist_ok=True)
@@ -26,10 +45,11 @@ class Manifest(aobject):
         self.manifest_sqlite_dir.mkdir(0o755, parents=True, exist_ok=True)
         self.manifest_sqlite_filename = f"{self.language}.content"
         self.manifest_mongo_dbname = f"{config.MANIFEST_DB_PREFIX}_{self.language}"
-        self.manifest_mongo_uri = config.MONGO_URI
+        self.snapshot_writer: SnapshotWriter | None = None
+        self.changes: dict[str, dict[str, list]] = {}
 
         await self.__check_origin_manifest()
-        self.mongo: AsyncIOMotorDatabase = AsyncIOMotorClient(self.manifest_mongo_uri)[
+        self.mongo: AsyncIOMotorDatabase = mongo_manager.importing[
             self.manifest_mongo_dbname
         ]
 
@@ -44,8 +64,8 @@ class Manifest(aobject):
                 self.language, ""
             )
         ):
-            await logger.info(f"Origin manifest version: {version}")
-            await logger.info(f"Origin path: {manifest_origin_path}")
+            logger.info(f"Origin manifest version: {version}")
+            logger.info(f"Origin path: {manifest_origin_path}")
             self.version: str = version
             self.manifest_origin_path: str = manifest_origin_path
 
@@ -54,10 +74,11 @@ class Manifest(aobject):
         doc = await self.mongo["manifest_version"].find_one({"_id": 1})
         version: str | None
         if not doc:
-            await logger.info("Cannot get local manifest version")
+            logger.info("Cannot get local manifest version")
             version = None
         else:
             version = doc.get("version", "")
+        self.previous_version = version
         if version != self.version:
             return True
         return False
@@ -67,15 +88,12 @@ class Manifest(aobject):
         download_path: Path = (
             self.manifest_download_dir / self.manifest_download_filename
         )
-        await logger.info(
-            f"Downloading manifest from {download_url} to {download_path}"
-        )
-        async with AsyncClient() as client:
-            async with client.stream("GET", download_url) as response:
-                async with aiofiles.open(download_path, "wb") as f:
-                    async for chunk in response.aiter_bytes():
-                        await f.write(chunk)
-        await logger.info("Download Complete")
+        logger.info(f"Downloading manifest from {download_url} to {download_path}")
+        async with http_client().stream("GET", download_url) as response:
+            async with aiofiles.open(download_path, "wb") as f:
+                async for chunk in response.aiter_bytes():
+                    await f.write(chunk)
+        logger.info("Download Complete")
 
     @async_wrap
     def unzip_manifest(self) -> None:
@@ -111,7 +129,7 @@ class Manifest(aobject):
                     yield tablename, table_meta
 
     async def iter_sqlite_table_data(self, tablename: str):
-        await logger.info(f"Fetching data from table [{tablename}]")
+        logger.info(f"Fetching data from table [{tablename}]")
         async with aiosqlite.connect(
             self.manifest_sqlite_dir / self.manifest_sqlite_filename
         ) as db:
@@ -158,10 +176,10 @@ class Manifest(aobject):
 
     async def batch_insert(self, tablename, batch: list) -> None:
         try:
-            await logger.info(f"Inserting into collection [{tablename}]")
-            await self.mongo[tablename].insert_many(batch)
+            logger.info(f"Inserting into collection [{tablename}]")
+            await self.mongo[tablename].insert_many(batch, ordered=False)
         except Exception as e:
-            await logger.exception(e)
+            logger.exception(e)
 
     async def update_version(self) -> None:
         await self.mongo["manifest_version"].update_one(
@@ -174,32 +192,272 @@ class Manifest(aobject):
             },
             upsert=True,
         )
+        negative_cache.clear(self.manifest_mongo_dbname)
 
     async def migrate_data(
         self,
         tablename: str,
         table_meta: dict[str, dict[str, str]],
     ) -> None:
+        """
+        Replace the collection of `tablename` and record what changed in it
+
+        The old collection is kept aside as `<tablename>__previous` during the
+        import so that each batch can be compared against it.
+        """
+        previous_tablename = f"{tablename}__previous"
         try:
-            await self.mongo[tablename].drop()
+            collections = await self.mongo.list_collection_names()
+            if previous_tablename in collections:
+                # Left over by an interrupted import, it is the complete old
+                # collection while `tablename` only holds part of the new one
+                await self.mongo[tablename].drop()
+            elif tablename in collections:
+                await self.mongo[tablename].rename(previous_tablename)
         except Exception as e:
-            await logger.exception(e)
+            logger.exception(e)
 
+        seen: set = set()
+        added: list = []
+        modified: list[dict] = []
         async for batch in self.iter_insert_batch(
             self.iter_sqlite_table_data(tablename), table_meta
         ):
+            if self.previous_version:
+                previous = {
+                    doc["_id"]: doc.get("json")
+                    async for doc in self.mongo[previous_tablename].find(
+                        {"_id": {"$in": [row["_id"] for row in batch]}}
+                    )
+                }
+                for row in batch:
+                    seen.add(row["_id"])
+                    if row["_id"] not in previous:
+                        added.append(row["_id"])
+                    elif previous[row["_id"]] != row["json"]:
+                        modified.append(
+                            {
+                                "hash": row["_id"],
+                                "paths": diff_paths(previous[row["_id"]], row["json"]),
+                            }
+                        )
             await self.batch_insert(tablename, batch)
-        await self.update_version()
+            if self.snapshot_writer and tablename in SNAPSHOT_FIELDS:
+                await self.write_snapshot_batch(tablename, batch)
+
+        if self.previous_version:
+            removed = [
+                doc["_id"]
+                async for doc in self.mongo[previous_tablename].find({}, {"_id": 1})
+                if doc["_id"] not in seen
+            ]
+            await self.store_changelog(tablename, added, removed, modified)
+        try:
+            await self.mongo[previous_tablename].drop()
+        except Exception as e:
+            logger.exception(e)
+
+    def open_snapshot(self) -> None:
+        if config.SNAPSHOT_ENABLED:
+            self.snapshot_writer = snapshots.writer(
+                self.manifest_mongo_dbname, self.version
+            )
+
+    @async_wrap
+    def write_snapshot_batch(self, tablename: str, batch: list[dict]) -> None:
+        fields = SNAPSHOT_FIELDS[tablename]
+        for row in batch:
+            self.snapshot_writer.add(
+                tablename,
+                row["_id"],
+                {key: row["json"][key] for key in fields if key in row["json"]},
+            )
+
+    @async_wrap
+    def publish_snapshot(self) -> None:
+        if self.snapshot_writer:
+            snapshots.publish(self.manifest_mongo_dbname, self.snapshot_writer.close())
+            self.snapshot_writer = None
+
+    def discard_snapshot(self) -> None:
+        """
+        Drop a snapshot left unpublished by a failed import
+        """
+        if self.snapshot_writer:
+            self.snapshot_writer.abort()
+            self.snapshot_writer = None
+
+    async def store_changelog(
+        self,
+        tablename: str,
+        added: list,
+        removed: list,
+        modified: list[dict],
+        chunk_size=5000,
+    ) -> None:
+        """
+        Store the changes of `tablename` between `previous_version` and `version`
+
+        Entries are split into chunks to stay below the BSON document size limit.
+        """
+        if not (added or removed or modified):
+            return
+        logger.info(
+            f"[{tablename}] added: {len(added)}, removed: {len(removed)}, "
+            f"modified: {len(modified)}"
+        )
+        self.changes[tablename] = {
+            "added": added,
+            "removed": removed,
+            "modified": modified,
+        }
+        collection = self.mongo[CHANGELOG_COLLECTION]
+        await collection.create_index([("from", 1), ("to", 1), ("table", 1)])
+        await collection.delete_many(
+            {"from": self.previous_version, "to": self.version, "table": tablename}
+        )
+        chunks = (max(len(added), len(removed), len(modified)) - 1) // chunk_size + 1
+        await collection.insert_many(
+            [
+                {
+                    "from": self.previous_version,
+                    "to": self.version,
+                    "table": tablename,
+                    "chunk": chunk,
+                    "create_time": datetime.now(),
+                    "added": added[chunk * chunk_size : (chunk + 1) * chunk_size],
+                    "removed": removed[chunk * chunk_size : (chunk + 1) * chunk_size],
+                    "modified": modified[chunk * chunk_size : (chunk + 1) * chunk_size],
+                }
+                for chunk in range(chunks)
+            ]
+        )
+
+    async def build_perk_index(self, batch_size=1000) -> None:
+        """
+        Build the plug hash -> weapon hashes index used by `GET /perk`
+
+        Each document holds the weapons able to roll the plug as a whole and per
+        socket column, as packed sorted uint32 arrays.
+        """
+        logger.info(f"Building [{PERK_INDEX_COLLECTION}]")
+        socket_entries: dict[int, list[dict]] = {}
+        async for doc in self.mongo["DestinyInventoryItemDefinition"].find(
+            {"json.itemCategoryHashes": 1, "json.sockets": {"$exists": True}},
+            {"json.sockets.socketEntries": 1},
+        ):
+            socket_entries[doc["_id"]] = (
+                doc["json"]["sockets"].get("socketEntries") or []
+            )
+
+        plug_set_keys = ("randomizedPlugSetHash", "reusablePlugSetHash")
+        plug_set_hashes = {
+            entry[key]
+            for entries in socket_entries.values()
+            for entry in entries
+            for key in plug_set_keys
+            if entry.get(key)
+        }
+        plug_sets: dict[int, list[int]] = {}
+        async for doc in self.mongo["DestinyPlugSetDefinition"].find(
+            {"_id": {"$in": list(plug_set_hashes)}},
+            {"json.reusablePlugItems.plugItemHash": 1},
+        ):
+            plug_sets[doc["_id"]] = [
+                plug.get("plugItemHash")
+                for plug in doc["json"].get("reusablePlugItems") or []
+            ]
+
+        index: dict[int, dict[int, set[int]]] = defaultdict(lambda: defaultdict(set))
+        for weapon_hash, entries in socket_entries.items():
+            for column, entry in enumerate(entries):
+                plug_hashes = set()
+                if initial_item_hash := entry.get("singleInitialItemHash"):
+                    plug_hashes.add(initial_item_hash)
+                for key in plug_set_keys:
+                    plug_hashes.update(plug_sets.get(entry.get(key), []))
+                for plug_hash in plug_hashes:
+                    index[plug_hash][column].add(weapon_hash)
+
+        names: dict[int, str] = {}
+        async for doc in self.mongo["DestinyInventoryItemDefinition"].find(
+            {"_id": {"$in": list(index)}}, {"json.displayProperties.name": 1}
+        ):
+            names[doc["_id"]] = doc["json"].get("displayProperties", {}).get("name")
+
+        try:
+            await self.mongo[PERK_INDEX_COLLECTION].drop()
+        except Exception as e:
+            logger.exception(e)
+        batch = []
+        for plug_hash, columns in index.items():
+            batch.append(
+                {
+                    "_id": plug_hash,
+                    "name": names.get(plug_hash, ""),
+                    "weapons": pack_hashes(
+                        weapon_hash
+                        for weapon_hashes in columns.values()
+                        for weapon_hash in weapon_hashes
+                    ),
+                    "columns": {
+                        str(column): pack_hashes(weapon_hashes)
+                        for column, weapon_hashes in columns.items()
+                    },
+                }
+            )
+            if len(batch) >= batch_size:
+                await self.batch_insert(PERK_INDEX_COLLECTION, batch)
+                batch = []
+        if batch:
+            await self.batch_insert(PERK_INDEX_COLLECTION, batch)
+        await self.mongo[PERK_INDEX_COLLECTION].create_index("name")
+
+    async def prefetch_icons(self) -> None:
+        """
+        Cache the icons of inventory items added by this version
+        """
+        added = self.changes.get("DestinyInventoryItemDefinition", {}).get("added")
+        if not config.ASSET_PREFETCH or not added:
+            return
+        icons = [
+            icon
+            async for doc in self.mongo["DestinyInventoryItemDefinition"].find(
+                {"_id": {"$in": added}}, {"json.displayProperties.icon": 1}
+            )
+            if (icon := doc["json"].get("displayProperties", {}).get("icon"))
+        ]
+        logger.info(f"Prefetching {len(icons)} icons")
+        if failed := await asset_store.prefetch(
+            icons, config.ASSET_PREFETCH_CONCURRENCY
+        ):
+            logger.warning(f"Failed to prefetch {failed} icons")
 
 
 async def manifest_task(language):
     manifest: Manifest = await Manifest(language)
     if await manifest.is_outdated:
-        await logger.info("Local manifest is outdated, updating")
+        logger.info("Local manifest is outdated, updating")
         await manifest.download_manifest()
         await manifest.unzip_manifest()
-        async for table, meta in manifest.iter_sqlite_tables():
-            await manifest.migrate_data(table, meta)
-        await logger.info("Local manifest update complete")
+        manifest.open_snapshot()
+        try:
+            async for table, meta in manifest.iter_sqlite_tables():
+                await manifest.migrate_data(table, meta)
+            await manifest.build_perk_index()
+            await manifest.update_version()
+            await manifest.publish_snapshot()
+        finally:
+            manifest.discard_snapshot()
+        await manifest_events.publish(
+            {
+                "language": manifest.language,
+                "old_version": manifest.previous_version,
+                "new_version": manifest.version,
+                "changed_tables": sorted(manifest.changes),
+            }
+        )
+        await manifest.prefetch_icons()
+        logger.info("Local manifest update complete")
     else:
-        await logger.info("Local manifest is up to date")
+        logger.info("Local manifest is up to date")
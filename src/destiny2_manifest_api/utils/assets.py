@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import aiofiles
+from httpx import HTTPError, Response
+
+from .. import config
+from .cache import SingleFlight
+from .functions import http_client
+
+ASSET_PATH_PATTERN = re.compile(r"^/?(common|img)/[\w./-]+$")
+VARIANT_FORMATS = {"webp": "image/webp", "png": "image/png", "jpeg": "image/jpeg"}
+
+
+class InvalidAssetPath(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class AssetNotFound(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class AssetUpstreamError(Exception):
+    def __init__(self, message, status_code: int = 502):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class AssetVariantUnsupported(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class Asset(NamedTuple):
+    path: Path
+    digest: str
+    content_type: str
+
+
+def _render_variant(source: str, width: int | None, format: str) -> bytes:
+    """
+    Resize and/or convert an image, runs in the worker pool
+    """
+    from PIL import Image
+
+    with Image.open(source) as image:
+        if width and width < image.width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        if format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format=format.upper())
+        return output.getvalue()
+
+
+class AssetStore:
+    """
+    Content-addressed on-disk cache of bungie.net assets
+
+    Blobs are stored under `blobs/` by the sha256 of their content, `refs/`
+    maps an asset path (and variant) to the digest and content type of a blob.
+    """
+
+    def __init__(self, directory: Path, host: str, workers: int) -> None:
+        self.directory = directory
+        self.host = host.rstrip("/")
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        # Kept apart from the entity lookups so that their counters stay readable
+        self.single_flight = SingleFlight()
+
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        if ".." in path or not ASSET_PATH_PATTERN.match(path):
+            raise InvalidAssetPath(f"Invalid asset path {path}")
+        return f"/{path.lstrip('/')}"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / digest
+
+    def _ref_path(self, path: str, variant: str = "") -> Path:
+        key = hashlib.sha256(f"{path}?{variant}".encode()).hexdigest()
+        return self.directory / "refs" / key[:2] / key
+
+    async def _read_ref(self, ref_path: Path) -> Asset | None:
+        try:
+            async with aiofiles.open(ref_path, "r") as f:
+                digest, content_type = (await f.read()).split("\n", 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            return None
+        return Asset(blob_path, digest, content_type)
+
+    async def _write(self, ref_path: Path, content: bytes, content_type: str) -> Asset:
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+        for target, data in (
+            (blob_path, content),
+            (ref_path, f"{digest}\n{content_type}".encode()),
+        ):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(data)
+            os.replace(tmp_path, target)
+        return Asset(blob_path, digest, content_type)
+
+    async def get(self, path: str) -> Asset:
+        path = self.normalize_path(path)
+        ref_path = self._ref_path(path)
+        if asset := await self._read_ref(ref_path):
+            return asset
+        return await self.single_flight.do(("asset", path), lambda: self._fetch(path))
+
+    async def _fetch(self, path: str) -> Asset:
+        ref_path = self._ref_path(path)
+        try:
+            response: Response = await http_client().get(f"{self.host}{path}")
+        except HTTPError as e:
+            raise AssetUpstreamError(f"Cannot fetch asset {path} ({e!r})")
+        if response.status_code == 404:
+            raise AssetNotFound(f"Unknown asset {path}")
+        if response.status_code != 200:
+            # Throttled or unavailable upstream is worth a retry, anything else isn't
+            raise AssetUpstreamError(
+                f"Cannot fetch asset {path} (upstream {response.status_code})",
+                503 if response.status_code in (429, 503) else 502,
+            )
+        content_type = response.headers.get("content-type", "")
+        return await self._write(ref_path, response.content, content_type)
+
+    async def get_variant(
+        self, path: str, width: int | None = None, format: str | None = None
+    ) -> Asset:
+        if not width and not format:
+            return await self.get(path)
+        path = self.normalize_path(path)
+        ref_path = self._ref_path(path, f"width={width}&format={format}")
+        if asset := await self._read_ref(ref_path):
+            return asset
+        return await self.single_flight.do(
+            ("asset", path, width, format),
+            lambda: self._render(path, ref_path, width, format),
+        )
+
+    async def _render(
+        self, path: str, ref_path: Path, width: int | None, format: str | None
+    ) -> Asset:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise AssetVariantUnsupported(
+                "Resized or converted assets require Pillow to be installed"
+            )
+        original = await self.get(path)
+        if not format:
+            format = next(
+                (f for f, t in VARIANT_FORMATS.items() if t == original.content_type),
+                "png",
+            )
+        content = await asyncio.get_running_loop().run_in_executor(
+            self.executor, _render_variant, str(original.path), width, format
+        )
+        return await self._write(ref_path, content, VARIANT_FORMATS[format])
+
+    async def prefetch(self, paths: Iterable[str], concurrency: int = 8) -> int:
+        """
+        Fetch every asset of `paths` not cached yet, returns how many failed
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(path: str) -> bool:
+            async with semaphore:
+                try:
+                    await self.get(path)
+                    return True
+                except Exception:
+                    return False
+
+        results = await asyncio.gather(*(fetch(path) for path in set(paths)))
+        return results.count(False)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+asset_store = AssetStore(
+    config.ASSET_SAVE_DIR, config.BUNGIE_ASSET_HOST, config.ASSET_WORKERS
+)
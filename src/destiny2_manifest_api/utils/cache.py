@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from .. import config
+
+
+class SingleFlight:
+    """
+    Share one in-flight computation between concurrent callers of the same key
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            # Run as a task so that a disconnecting caller cannot cancel it for
+            # every other caller waiting on the same key
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def as_dict(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+class NegativeCache:
+    """
+    Remember lookups which found nothing for `ttl` seconds
+
+    Keys are tuples starting with the database name, so that entries of one
+    language can be dropped when its manifest version changes.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: dict[tuple, float] = {}
+        self.hits = 0
+
+    def __contains__(self, key: tuple) -> bool:
+        if (expires := self._entries.get(key)) is None:
+            return False
+        if expires < time.monotonic():
+            del self._entries[key]
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, key: tuple) -> None:
+        if self.ttl <= 0:
+            return
+        if len(self._entries) >= self.max_size:
+            # Entries are kept in insertion order, drop the oldest one
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = time.monotonic() + self.ttl
+
+    def clear(self, dbname: str | None = None) -> None:
+        if dbname is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == dbname]:
+            del self._entries[key]
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "size": len(self._entries)}
+
+
+single_flight = SingleFlight()
+negative_cache = NegativeCache(config.NEGATIVE_CACHE_TTL, config.NEGATIVE_CACHE_SIZE)
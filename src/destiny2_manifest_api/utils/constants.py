@@ -40,3 +40,57 @@ YEAR_SEASON_MAPPING = {
     3: [8, 9, 10, 11],
     4: [12, 13, 14, 15],
 }
+
+SOCKET_CATEGORY_MAPPING = {
+    "intrinsic": 3956125808,
+    "perks": 4241085061,
+    "mods": 2685412949,
+    "cosmetics": 2048875504,
+}
+
+TIER_TYPE_MAPPING = {
+    "basic": 3772930460,
+    "common": 3340296461,
+    "rare": 2127292149,
+    "legendary": 4008398120,
+    "exotic": 2759499571,
+}
+
+DAMAGE_TYPE_MAPPING = {
+    "kinetic": 1,
+    "arc": 2,
+    "solar": 3,
+    "void": 4,
+    "stasis": 6,
+    "strand": 7,
+}
+
+AMMO_TYPE_MAPPING = {
+    "primary": 1,
+    "special": 2,
+    "heavy": 3,
+}
+
+PERK_INDEX_COLLECTION = "perk_index"
+
+CHANGELOG_COLLECTION = "manifest_changelog"
+
+# Fields of each definition read by the models, kept in the compiled snapshot
+SNAPSHOT_FIELDS = {
+    "DestinyInventoryItemDefinition": (
+        "displayProperties",
+        "iconWatermark",
+        "inventory",
+        "itemCategoryHashes",
+        "defaultDamageType",
+        "equippingBlock",
+        "investmentStats",
+        "sockets",
+        "stats",
+        "index",
+    ),
+    "DestinyPlugSetDefinition": ("displayProperties", "reusablePlugItems", "index"),
+    "DestinySocketCategoryDefinition": ("displayProperties", "index"),
+    "DestinyStatDefinition": ("displayProperties", "index"),
+    "DestinyLoreDefinition": ("displayProperties", "subtitle", "index"),
+}
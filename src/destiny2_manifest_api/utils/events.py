@@ -0,0 +1,106 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from .. import config
+from .logging import create_logger
+from .mongo import mongo_manager
+
+logger = create_logger("destiny_manifest_api.events", "events.log")
+
+
+class ManifestEvents:
+    """
+    Fan manifest version changes out to every subscriber of every worker
+
+    With the `mongo` backend events are appended to a capped collection which
+    each worker tails, the `local` backend only reaches subscribers of the
+    publishing process.
+    """
+
+    collection_name = "manifest_events"
+
+    def __init__(self, backend: str, queue_size: int = 100) -> None:
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._watcher: asyncio.Task | None = None
+
+    async def _collection(self, client: AsyncIOMotorClient) -> AsyncIOMotorCollection:
+        db = client[config.MANIFEST_DB_PREFIX]
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=1 << 20)
+        except CollectionInvalid:
+            pass
+        return db[self.collection_name]
+
+    @contextmanager
+    def subscribe(self):
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def _broadcast(self, event: dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                # Slow consumer, drop its oldest event rather than block
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, event: dict) -> None:
+        event = {**event, "time": datetime.now().isoformat()}
+        if self.backend == "mongo":
+            collection = await self._collection(mongo_manager.importing)
+            await collection.insert_one(event)
+        else:
+            self._broadcast(event)
+
+    async def _watch(self) -> None:
+        collection: AsyncIOMotorCollection | None = None
+        last_id = None
+        while True:
+            try:
+                if collection is None:
+                    # Only skip past history once, retries resume from last_id
+                    watched = await self._collection(mongo_manager.serving)
+                    last = await watched.find_one(sort=[("$natural", -1)])
+                    last_id = last["_id"] if last else None
+                    collection = watched
+                cursor = collection.find(
+                    {"_id": {"$gt": last_id}} if last_id else {},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                )
+                while cursor.alive:
+                    async for doc in cursor:
+                        last_id = doc.pop("_id")
+                        self._broadcast({"id": str(last_id), **doc})
+                # A tailable cursor on an empty collection dies immediately
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(e)
+                await asyncio.sleep(5)
+
+    def start(self) -> None:
+        if self.backend == "mongo" and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+
+manifest_events = ManifestEvents(config.MANIFEST_EVENTS_BACKEND)
@@ -1,9 +1,16 @@
 import asyncio
+import heapq
+import sys
+import time
+from array import array
+from bisect import bisect_left
 from functools import partial, wraps
+from typing import Iterable, Sequence
 
 from httpx import AsyncClient, Response
 
 from .. import config
+from .profiling import span
 
 
 class ResponseError(Exception):
@@ -25,13 +32,30 @@ class ResponseError(Exception):
         return self.__str__()
 
 
+_http_client: AsyncClient | None = None
+
+
+def http_client() -> AsyncClient:
+    """
+    HTTP client shared by every request to bungie.net, reusing its connections
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = AsyncClient(timeout=config.HTTP_TIMEOUT)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    if _http_client is not None:
+        await _http_client.aclose()
+
+
 async def api_request(method: str, endpoint: str, **kwargs) -> Response:
     if not endpoint.startswith("/"):
         endpoint = f"/{endpoint}"
     url = f"{config.BUNGIE_API_ROOT}{endpoint}"
     kwargs = {**{"headers": {"X-API-Key": str(config.BUNGIE_API_KEY)}}, **kwargs}
-    async with AsyncClient() as client:
-        response: Response = await client.request(method, url, **kwargs)
+    response: Response = await http_client().request(method, url, **kwargs)
     if not response.status_code == 200:
         raise ResponseError(response)
     return response
@@ -57,8 +81,105 @@ class aobject(object):
 
     async def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
-        await instance.__init__(*args, **kwargs)
+        with span(cls.__name__):
+            await instance.__init__(*args, **kwargs)
         return instance
 
     async def __init__(self):
         pass
+
+
+# Hashes are stored as little-endian uint32, array("I") has to match that width
+if array("I").itemsize != 4:
+    raise RuntimeError("array('I') is not 32-bit on this platform")
+
+
+def pack_hashes(hashes: Iterable[int]) -> bytes:
+    """
+    Pack unsigned 32-bit hashes into a sorted little-endian uint32 array
+    """
+    packed = array("I", sorted(set(hashes)))
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_hashes(data: bytes) -> array:
+    unpacked = array("I")
+    unpacked.frombytes(data)
+    if sys.byteorder != "little":
+        unpacked.byteswap()
+    return unpacked
+
+
+def intersect_sorted(a: Sequence[int], b: Sequence[int]) -> list[int]:
+    """
+    Intersect two sorted sequences, galloping through the larger one
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    result: list[int] = []
+    lo = 0
+    for value in a:
+        lo = bisect_left(b, value, lo)
+        if lo == len(b):
+            break
+        if b[lo] == value:
+            result.append(value)
+    return result
+
+
+def contains_sorted(values: Sequence[int], value: int) -> bool:
+    index = bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+def union_sorted(*sequences: Sequence[int]) -> list[int]:
+    result: list[int] = []
+    for value in heapq.merge(*sequences):
+        if not result or result[-1] != value:
+            result.append(value)
+    return result
+
+
+def diff_paths(old, new, prefix: str = "") -> list[str]:
+    """
+    Dotted paths at which two decoded JSON documents differ
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        paths: list[str] = []
+        for key in old.keys() | new.keys():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if key not in old or key not in new:
+                paths.append(path)
+            elif old[key] != new[key]:
+                paths.extend(diff_paths(old[key], new[key], path))
+        return sorted(paths)
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        paths = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            if old_item != new_item:
+                path = f"{prefix}.{index}" if prefix else str(index)
+                paths.extend(diff_paths(old_item, new_item, path))
+        return paths
+    return [prefix] if old != new else []
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Take a token, returns 0 on success or the seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
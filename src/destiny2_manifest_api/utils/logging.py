@@ -1,22 +1,207 @@
+import atexit
+import json
+import logging
 import sys
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import TextIO
 
-from aiologger import Logger
-from aiologger.formatters.base import Formatter
-from aiologger.handlers.files import AsyncFileHandler
-from aiologger.handlers.streams import AsyncStreamHandler
+from .functions import TokenBucket
 
 
-def create_logger(name="destiny_manifest_api", filename="app.log"):
-    from ..config import LOG_FILE_PATH, LOG_LEVEL
+class LogPipeline:
+    """
+    Buffer log records in memory and write them in batches from a thread
+
+    Logging never blocks nor awaits on the event loop: when the ring buffer is
+    full the oldest record is dropped and counted instead.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        capacity: int = 10000,
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+        stream: TextIO = sys.stdout,
+    ) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.stream = stream
+        self._buffer: deque[tuple[str, dict]] = deque(maxlen=capacity)
+        self._files: dict[str, TextIO] = {}
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+        self.written = 0
+        self.dropped_overflow = 0
+        self.dropped_sampled: dict[str, int] = defaultdict(int)
+
+    def submit(self, filename: str, record: dict) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped_overflow += 1
+        self._buffer.append((filename, record))
+        if self._writer is None:
+            self._start()
+        elif len(self._buffer) >= self.batch_size and not self._wakeup.is_set():
+            # A full batch is waiting, don't let it sit until the next interval
+            self._wakeup.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._run, name="log-writer", daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            while self._buffer:
+                lines: dict[str, list[str]] = defaultdict(list)
+                for _ in range(min(self.batch_size, len(self._buffer))):
+                    filename, record = self._buffer.popleft()
+                    lines[filename].append(
+                        json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                    )
+                for filename, batch in lines.items():
+                    self._file(filename).writelines(batch)
+                    self.stream.writelines(batch)
+                    self.written += len(batch)
+            for f in (*self._files.values(), self.stream):
+                f.flush()
+
+    def _file(self, filename: str) -> TextIO:
+        if filename not in self._files:
+            self._files[filename] = open(
+                self.directory / filename, "a", encoding="utf-8"
+            )
+        return self._files[filename]
+
+    def as_dict(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped_overflow": self.dropped_overflow,
+            "dropped_sampled": dict(self.dropped_sampled),
+        }
+
+
+class Logger:
+    """
+    Structured logger writing JSON lines through a `LogPipeline`
+
+    Each call site below WARNING is rate limited separately, so a message
+    repeated in a hot loop is sampled down instead of flooding the pipeline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        filename: str,
+        level: int,
+        pipeline: LogPipeline,
+        rate: float,
+        burst: int,
+    ) -> None:
+        self.name = name
+        self.filename = filename
+        self.level = level
+        self.pipeline = pipeline
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[tuple[str, int], TokenBucket] = {}
+
+    def _sampled_out(self, frame) -> bool:
+        if self.rate <= 0:
+            return False
+        key = (frame.f_code.co_filename, frame.f_lineno)
+        if (bucket := self._buckets.get(key)) is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket.take() > 0
 
-    logger = Logger(name=name, level=LOG_LEVEL)
-    formatter = Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    def _log(self, level: int, msg, exc_info=None) -> None:
+        if level < self.level:
+            return
+        # Warnings and errors are rare and matter most when they repeat, only
+        # sample the chatty levels. Frame of the caller of debug()/info()/...
+        if level < logging.WARNING and self._sampled_out(sys._getframe(2)):
+            self.pipeline.dropped_sampled[self.name] += 1
+            return
+        record = {
+            "time": time.time(),
+            "level": logging.getLevelName(level),
+            "logger": self.name,
+            "message": str(msg),
+        }
+        if exc_info and exc_info[0] is not None:
+            record["exception"] = "".join(traceback.format_exception(*exc_info))
+        self.pipeline.submit(self.filename, record)
 
-    filehandler = AsyncFileHandler(str((LOG_FILE_PATH / filename).absolute()))
-    filehandler.formatter = formatter
-    logger.add_handler(filehandler)
+    def debug(self, msg) -> None:
+        self._log(logging.DEBUG, msg)
+
+    def info(self, msg) -> None:
+        self._log(logging.INFO, msg)
+
+    def warning(self, msg) -> None:
+        self._log(logging.WARNING, msg)
+
+    def error(self, msg) -> None:
+        self._log(logging.ERROR, msg)
+
+    def critical(self, msg) -> None:
+        self._log(logging.CRITICAL, msg)
+
+    def exception(self, msg) -> None:
+        if isinstance(msg, BaseException):
+            exc_info = (type(msg), msg, msg.__traceback__)
+        else:
+            exc_info = sys.exc_info()
+        self._log(logging.ERROR, msg, exc_info)
+
+
+_pipeline: LogPipeline | None = None
+
+
+def get_pipeline() -> LogPipeline:
+    global _pipeline
+    if _pipeline is None:
+        from ..config import (
+            LOG_BATCH_SIZE,
+            LOG_BUFFER_SIZE,
+            LOG_FILE_PATH,
+            LOG_FLUSH_INTERVAL,
+        )
+
+        _pipeline = LogPipeline(
+            LOG_FILE_PATH,
+            capacity=LOG_BUFFER_SIZE,
+            flush_interval=LOG_FLUSH_INTERVAL,
+            batch_size=LOG_BATCH_SIZE,
+        )
+    return _pipeline
+
+
+def create_logger(name="destiny_manifest_api", filename="app.log"):
+    from ..config import LOG_LEVEL, LOG_RATE_BURST, LOG_RATE_LIMIT
 
-    streamhandler = AsyncStreamHandler(sys.stdout)
-    streamhandler.formatter = formatter
-    logger.add_handler(streamhandler)
-    return logger
+    return Logger(
+        name,
+        filename,
+        LOG_LEVEL,
+        get_pipeline(),
+        rate=LOG_RATE_LIMIT,
+        burst=LOG_RATE_BURST,
+    )
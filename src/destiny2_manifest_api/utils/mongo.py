@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.mongo_client import MongoClient
+
+from .. import config
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    """
+    Collect how long operations wait to check a connection out of a pool
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Check out is started and completed on the same (executor) thread
+        self._local = threading.local()
+        self.checkouts = 0
+        self.failures = 0
+        self.in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        with self._lock:
+            self.in_use += 1
+            if started is None:
+                return
+            wait = time.perf_counter() - started
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.failures += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "failures": self.failures,
+                "in_use": self.in_use,
+                "avg_wait_ms": (
+                    self.total_wait / self.checkouts * 1000 if self.checkouts else 0
+                ),
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+def _write_concern(w: str) -> int | str:
+    return int(w) if w.isdigit() else w
+
+
+class MongoManager:
+    """
+    Own every MongoDB client of the process
+
+    Request serving and manifest import use separately sized pools so that a
+    running import cannot starve request traffic of connections, the
+    synchronous client is only used by the APScheduler job store.
+    """
+
+    def __init__(self, uri: str) -> None:
+        self.uri = uri
+        self.listeners: dict[str, PoolWaitListener] = {
+            "serving": PoolWaitListener(),
+            "importing": PoolWaitListener(),
+            "sync": PoolWaitListener(),
+        }
+        self._serving: AsyncIOMotorClient | None = None
+        self._importing: AsyncIOMotorClient | None = None
+        self._sync: MongoClient | None = None
+
+    def _motor_client(self, name: str, **options) -> AsyncIOMotorClient:
+        client = AsyncIOMotorClient(
+            self.uri,
+            compressors=config.MONGO_COMPRESSORS,
+            event_listeners=[self.listeners[name]],
+            **options,
+        )
+        client.get_io_loop = asyncio.get_running_loop
+        return client
+
+    @property
+    def serving(self) -> AsyncIOMotorClient:
+        if self._serving is None:
+            self._serving = self._motor_client(
+                "serving",
+                maxPoolSize=config.MONGO_SERVING_MAX_POOL_SIZE,
+                minPoolSize=config.MONGO_SERVING_MIN_POOL_SIZE,
+                readPreference=config.MONGO_READ_PREFERENCE,
+            )
+        return self._serving
+
+    @property
+    def importing(self) -> AsyncIOMotorClient:
+        if self._importing is None:
+            self._importing = self._motor_client(
+                "importing",
+                maxPoolSize=config.MONGO_IMPORT_MAX_POOL_SIZE,
+                minPoolSize=0,
+                w=_write_concern(config.MONGO_IMPORT_WRITE_CONCERN),
+            )
+        return self._importing
+
+    @property
+    def sync(self) -> MongoClient:
+        if self._sync is None:
+            self._sync = MongoClient(
+                self.uri,
+                compressors=config.MONGO_COMPRESSORS,
+                maxPoolSize=config.MONGO_SYNC_MAX_POOL_SIZE,
+                event_listeners=[self.listeners["sync"]],
+            )
+        return self._sync
+
+    async def connect(self) -> None:
+        # Create the serving pool before the first request hits it
+        await self.serving.admin.command("ping")
+
+    async def close(self) -> None:
+        for client in (self._serving, self._importing, self._sync):
+            if client is not None:
+                client.close()
+        self._serving = self._importing = self._sync = None
+
+    def metrics(self) -> dict[str, dict]:
+        return {name: listener.as_dict() for name, listener in self.listeners.items()}
+
+
+mongo_manager = MongoManager(config.MONGO_URI)
@@ -0,0 +1,162 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Sampler(threading.Thread):
+    """
+    Periodically record the stack of the thread running the event loop
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: list[tuple[float, list[tuple[str, str, int]]]] = []
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((time.perf_counter(), stack))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class Trace:
+    """
+    Await-level trace of a single request, exported in speedscope format
+
+    Spans are opened around model construction and MongoDB queries, stacks of
+    the event loop thread are sampled alongside. Other requests served
+    concurrently by the same worker show up in the samples too.
+    """
+
+    def __init__(self, name: str, sample_interval: float) -> None:
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self.events: list[tuple[str, str, float]] = []
+        self.queries: list[dict] = []
+        self.sampler = Sampler(threading.get_ident(), sample_interval)
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    @contextmanager
+    def span(self, name: str):
+        self.events.append(("O", name, self._now()))
+        try:
+            yield
+        finally:
+            self.events.append(("C", name, self._now()))
+
+    @contextmanager
+    def query(self, source: str, collection: str, filter: dict):
+        started = self._now()
+        with self.span(f"{source} {collection}"):
+            yield
+        self.queries.append(
+            {
+                "source": source,
+                "collection": collection,
+                "filter": repr(filter),
+                "start_ms": started,
+                "duration_ms": self._now() - started,
+            }
+        )
+
+    def start(self) -> None:
+        self.sampler.start()
+
+    def stop(self) -> None:
+        self.finished = self._now()
+        self.sampler.stop()
+
+    def as_speedscope(self) -> dict:
+        frames: list[dict] = []
+        frame_index: dict[tuple, int] = {}
+
+        def intern(name: str, file: str | None = None, line: int | None = None):
+            key = (name, file, line)
+            if key not in frame_index:
+                frame_index[key] = len(frames)
+                frame = {"name": name}
+                if file:
+                    frame.update(file=file, line=line)
+                frames.append(frame)
+            return frame_index[key]
+
+        end = self.finished if self.finished is not None else self._now()
+        samples, weights = [], []
+        previous = self.started
+        for at, stack in self.sampler.samples:
+            samples.append([intern(*frame) for frame in stack])
+            weights.append((at - previous) * 1000)
+            previous = at
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "destiny2_manifest_api",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "evented",
+                    "name": f"{self.name} (await trace)",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": end,
+                    "events": [
+                        {"type": type, "frame": intern(name), "at": at}
+                        for type, name, at in self.events
+                    ],
+                },
+                {
+                    "type": "sampled",
+                    "name": f"{self.name} (samples)",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": end,
+                    "samples": samples,
+                    "weights": weights,
+                },
+            ],
+            "queries": self.queries,
+        }
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """
+    Open a span in the trace of the current request, if it is being profiled
+    """
+    if (trace := current_trace.get()) is None:
+        yield
+    else:
+        with trace.span(name):
+            yield
+
+
+@contextmanager
+def traced_query(source: str, collection: str, filter: dict):
+    if (trace := current_trace.get()) is None:
+        yield
+    else:
+        with trace.query(source, collection, filter):
+            yield
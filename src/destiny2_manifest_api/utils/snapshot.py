@@ -0,0 +1,178 @@
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable
+
+from .. import config
+
+MAGIC = b"D2MS"
+FORMAT_VERSION = 1
+# magic, format version, table count, index offset
+HEADER = struct.Struct("<4sHHQ")
+# table name length, record count
+TABLE_HEADER = struct.Struct("<HI")
+
+
+def _padding(offset: int, alignment: int = 8) -> int:
+    return -offset % alignment
+
+
+class SnapshotWriter:
+    """
+    Write a read-only snapshot of manifest definitions
+
+    Layout: header, compact JSON records, then for every table its name and
+    three aligned arrays sorted by hash: hashes (uint32), record offsets
+    (uint64) and record lengths (uint32).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.tmp_path = path.with_name(f"{path.name}.tmp")
+        self.file = open(self.tmp_path, "wb")
+        self.file.write(b"\0" * HEADER.size)
+        self.tables: dict[str, list[tuple[int, int, int]]] = {}
+
+    def add(self, table: str, hash: int, record: dict) -> None:
+        data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+        self.tables.setdefault(table, []).append((hash, self.file.tell(), len(data)))
+        self.file.write(data)
+
+    def _align(self) -> None:
+        self.file.write(b"\0" * _padding(self.file.tell()))
+
+    def close(self) -> Path:
+        self._align()
+        index_offset = self.file.tell()
+        for table, entries in self.tables.items():
+            entries.sort()
+            name = table.encode()
+            self.file.write(TABLE_HEADER.pack(len(name), len(entries)))
+            self.file.write(name)
+            self._align()
+            for typecode, column in (("I", 0), ("Q", 1), ("I", 2)):
+                values = array(typecode, (entry[column] for entry in entries))
+                self.file.write(values.tobytes())
+                self._align()
+        self.file.seek(0)
+        self.file.write(
+            HEADER.pack(MAGIC, FORMAT_VERSION, len(self.tables), index_offset)
+        )
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class Snapshot:
+    """
+    Memory-mapped snapshot, pages are shared between every worker process
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, table_count, offset = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot {path}")
+
+        view = memoryview(self.mm)
+        self.tables: dict[str, tuple[memoryview, memoryview, memoryview]] = {}
+        for _ in range(table_count):
+            name_length, count = TABLE_HEADER.unpack_from(self.mm, offset)
+            offset += TABLE_HEADER.size
+            name = self.mm[offset : offset + name_length].decode()
+            offset += name_length
+            offset += _padding(offset)
+            columns = []
+            for typecode, itemsize in (("I", 4), ("Q", 8), ("I", 4)):
+                size = itemsize * count
+                columns.append(view[offset : offset + size].cast(typecode))
+                offset += size + _padding(size)
+            self.tables[name] = tuple(columns)
+
+    def __contains__(self, table: str) -> bool:
+        return table in self.tables
+
+    def get(self, table: str, hash: int) -> dict | None:
+        hashes, offsets, lengths = self.tables[table]
+        index = bisect_left(hashes, hash)
+        if index == len(hashes) or hashes[index] != hash:
+            return None
+        offset = offsets[index]
+        return json.loads(self.mm[offset : offset + lengths[index]])
+
+
+class SnapshotRegistry:
+    """
+    Snapshots currently published for each database
+
+    The import publishes a snapshot by pointing `<dbname>.current` at it, every
+    worker notices the change within `check_interval` seconds and swaps to the
+    new file without restarting.
+    """
+
+    def __init__(self, directory: Path, check_interval: float = 5.0) -> None:
+        self.directory = directory
+        self.check_interval = check_interval
+        self._snapshots: dict[str, Snapshot] = {}
+        self._checked: dict[str, float] = {}
+        self.swap_callbacks: list[Callable[[str], None]] = []
+
+    def pointer(self, dbname: str) -> Path:
+        return self.directory / f"{dbname}.current"
+
+    def path(self, dbname: str, version: str) -> Path:
+        return self.directory / f"{dbname}.{version.replace('/', '_')}.snap"
+
+    def writer(self, dbname: str, version: str) -> SnapshotWriter:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return SnapshotWriter(self.path(dbname, version))
+
+    def publish(self, dbname: str, path: Path) -> None:
+        tmp_pointer = self.pointer(dbname).with_suffix(".tmp")
+        tmp_pointer.write_text(path.name)
+        os.replace(tmp_pointer, self.pointer(dbname))
+        # Workers still mapping an old file keep it alive until they swap
+        for old in self.directory.glob(f"{dbname}.*.snap"):
+            if old.name != path.name:
+                old.unlink(missing_ok=True)
+
+    def get(self, dbname: str) -> Snapshot | None:
+        now = time.monotonic()
+        last_checked = self._checked.get(dbname)
+        if last_checked is None or now - last_checked >= self.check_interval:
+            self._checked[dbname] = now
+            self._refresh(dbname)
+        return self._snapshots.get(dbname)
+
+    def _refresh(self, dbname: str) -> None:
+        try:
+            filename = self.pointer(dbname).read_text().strip()
+        except FileNotFoundError:
+            self._snapshots.pop(dbname, None)
+            return
+        current = self._snapshots.get(dbname)
+        if current and current.path.name == filename:
+            return
+        try:
+            self._snapshots[dbname] = Snapshot(self.directory / filename)
+        except (OSError, ValueError):
+            self._snapshots.pop(dbname, None)
+            return
+        for callback in self.swap_callbacks:
+            callback(dbname)
+
+
+snapshots = SnapshotRegistry(
+    config.MANIFEST_SAVE_DIR / "snapshot", config.SNAPSHOT_CHECK_INTERVAL
+)
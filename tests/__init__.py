@@ -0,0 +1,4 @@
+import os
+
+# config refuses to load without an API key, none of the tests reach Bungie
+os.environ.setdefault("BUNGIE_API_KEY", "test")
@@ -0,0 +1,134 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient
+
+from destiny2_manifest_api.app.admission import AdmissionController
+from destiny2_manifest_api.utils.functions import TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+    @mock.patch("destiny2_manifest_api.utils.functions.time.monotonic")
+    def test_take(self, monotonic):
+        monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=2, burst=2)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertAlmostEqual(bucket.take(), 0.5)
+
+        monotonic.return_value = 100.5
+        self.assertEqual(bucket.take(), 0)
+        self.assertGreater(bucket.take(), 0)
+
+        # Refilling never exceeds the burst
+        monotonic.return_value = 200.0
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertGreater(bucket.take(), 0)
+
+
+class AdmissionControllerTest(unittest.IsolatedAsyncioTestCase):
+    async def make_client(self, **kwargs) -> AsyncClient:
+        options = dict(lag_threshold=0.25, client_rate=0, client_burst=1)
+        options.update(kwargs)
+        self.admission = AdmissionController({"/weapon/": 1}, **options)
+        self.seen: list[int] = []
+        app = FastAPI()
+
+        @app.get("/weapon/")
+        async def weapon():
+            async def body():
+                for chunk in (b"a", b"b"):
+                    self.seen.append(self.admission.in_flight["/weapon/"])
+                    yield chunk
+
+            return StreamingResponse(body())
+
+        @app.get("/weapon/error")
+        async def error():
+            raise RuntimeError("boom")
+
+        @app.get("/status/")
+        async def status():
+            return {}
+
+        app.middleware("http")(self.admission)
+        client = AsyncClient(app=app, base_url="http://test")
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def test_quota(self):
+        client = await self.make_client(client_rate=0.001, client_burst=2)
+        self.assertEqual((await client.get("/weapon/")).status_code, 200)
+        self.assertEqual((await client.get("/weapon/")).status_code, 200)
+        response = await client.get("/weapon/")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+        self.assertEqual(self.admission.rejected["quota"], 1)
+        # Routes outside quota_routes are never limited
+        for _ in range(5):
+            self.assertEqual((await client.get("/status/")).status_code, 200)
+
+    async def test_quota_client_header(self):
+        client = await self.make_client(
+            client_rate=0.001, client_burst=1, client_header="X-Forwarded-For"
+        )
+        headers = {"X-Forwarded-For": "spoofed, 10.0.0.1"}
+        self.assertEqual(
+            (await client.get("/weapon/", headers=headers)).status_code, 200
+        )
+        self.assertEqual(
+            (await client.get("/weapon/", headers=headers)).status_code, 429
+        )
+        headers = {"X-Forwarded-For": "spoofed, 10.0.0.2"}
+        self.assertEqual(
+            (await client.get("/weapon/", headers=headers)).status_code, 200
+        )
+
+    async def test_concurrency_released_after_body(self):
+        client = await self.make_client()
+        response = await client.get("/weapon/")
+        self.assertEqual(response.content, b"ab")
+        self.assertEqual(self.seen, [1, 1])
+        self.assertEqual(self.admission.in_flight["/weapon/"], 0)
+
+        # Starlette 0.16 re-raises errors of the endpoint through the middleware
+        with self.assertRaises(BaseException):
+            await client.get("/weapon/error")
+        self.assertEqual(self.admission.in_flight["/weapon/"], 0)
+
+    async def test_concurrency_limit(self):
+        client = await self.make_client()
+        self.admission.in_flight["/weapon/"] = 1
+        self.assertEqual((await client.get("/weapon/")).status_code, 503)
+        self.assertEqual(self.admission.rejected["concurrency"], 1)
+        self.assertEqual(self.admission.in_flight["/weapon/"], 1)
+
+    async def test_loop_lag(self):
+        client = await self.make_client()
+        self.admission.lag_monitor.lag = 0.5
+        self.assertEqual((await client.get("/weapon/")).status_code, 503)
+        self.assertEqual((await client.get("/status/")).status_code, 200)
+        self.assertEqual(self.admission.rejected["loop_lag"], 1)
+
+    async def test_pool_saturation(self):
+        pool = SimpleNamespace(in_use=8)
+        client = await self.make_client(pool=pool, pool_threshold=9)
+        self.assertEqual((await client.get("/weapon/")).status_code, 200)
+        pool.in_use = 9
+        self.assertEqual((await client.get("/weapon/")).status_code, 503)
+        self.assertEqual((await client.get("/status/")).status_code, 200)
+        self.assertEqual(self.admission.rejected["pool"], 1)
+
+    def test_parse_route_limits(self):
+        self.assertEqual(
+            AdmissionController.parse_route_limits(["/weapon/=64", " /perk/ =8"]),
+            {"/weapon/": 64, "/perk/": 8},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import socket
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from destiny2_manifest_api.app.apis import asset
+from destiny2_manifest_api.utils.assets import (
+    AssetNotFound,
+    AssetStore,
+    AssetUpstreamError,
+    InvalidAssetPath,
+)
+from destiny2_manifest_api.utils.functions import close_http_client
+
+ICON = b"\x89PNG\r\n\x1a\n icon"
+STATUSES = {"missing": 404, "throttled": 429, "broken": 500, "busy": 503}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the bungie.net asset host
+    """
+
+    hits: Counter = Counter()
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        name = self.path.rsplit("/", 1)[-1].split(".")[0]
+        status = STATUSES.get(name, 200)
+        body = ICON if status == 200 else b"error"
+        self.send_response(status)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AssetStoreTest(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.host = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncSetUp(self):
+        StandInHandler.hits.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = AssetStore(Path(directory.name), self.host, workers=1)
+        self.addAsyncCleanup(close_http_client)
+
+    async def test_fetch_and_cache(self):
+        first = await self.store.get("common/icons/ok.png")
+        self.assertEqual(first.path.read_bytes(), ICON)
+        self.assertEqual(first.content_type, "image/png")
+        second = await self.store.get("/common/icons/ok.png")
+        self.assertEqual(second, first)
+        self.assertEqual(StandInHandler.hits["/common/icons/ok.png"], 1)
+
+    async def test_concurrent_fetches_are_coalesced(self):
+        results = await asyncio.gather(
+            *(self.store.get("/common/icons/shared.png") for _ in range(5))
+        )
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(StandInHandler.hits["/common/icons/shared.png"], 1)
+        self.assertEqual(self.store.single_flight.coalesced, 4)
+
+    async def test_not_found(self):
+        with self.assertRaises(AssetNotFound):
+            await self.store.get("/common/icons/missing.png")
+
+    async def test_upstream_errors(self):
+        for name, status_code in (("throttled", 503), ("busy", 503), ("broken", 502)):
+            with self.subTest(name=name):
+                with self.assertRaises(AssetUpstreamError) as raised:
+                    await self.store.get(f"/common/icons/{name}.png")
+                self.assertEqual(raised.exception.status_code, status_code)
+
+    async def test_unreachable_upstream(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self.store.host = f"http://127.0.0.1:{port}"
+        with self.assertRaises(AssetUpstreamError) as raised:
+            await self.store.get("/common/icons/ok.png")
+        self.assertEqual(raised.exception.status_code, 502)
+
+    async def test_invalid_path(self):
+        for path in ("/common/../secret", "/Platform/User", "common/a b.png"):
+            with self.subTest(path=path):
+                with self.assertRaises(InvalidAssetPath):
+                    await self.store.get(path)
+
+    async def test_endpoint(self):
+        app = FastAPI()
+        asset.init_app(app)
+        client = AsyncClient(app=app, base_url="http://test")
+        self.addAsyncCleanup(client.aclose)
+        with mock.patch.object(asset, "asset_store", self.store):
+            response = await client.get("/asset/common/icons/ok.png")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, ICON)
+            self.assertIn("immutable", response.headers["cache-control"])
+            etag = response.headers["etag"]
+
+            response = await client.get(
+                "/asset/common/icons/ok.png", headers={"If-None-Match": etag}
+            )
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(StandInHandler.hits["/common/icons/ok.png"], 1)
+
+            for name, status_code in (
+                ("missing", 404),
+                ("throttled", 503),
+                ("broken", 502),
+            ):
+                response = await client.get(f"/asset/common/icons/{name}.png")
+                self.assertEqual(response.status_code, status_code)
+                self.assertIn("message", response.json())
+            response = await client.get("/asset/Platform/User")
+            self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from destiny2_manifest_api.utils.cache import NegativeCache, SingleFlight
+
+
+class NegativeCacheTest(unittest.TestCase):
+    @mock.patch("destiny2_manifest_api.utils.cache.time.monotonic")
+    def test_ttl(self, monotonic):
+        monotonic.return_value = 100.0
+        cache = NegativeCache(ttl=30, max_size=10)
+        cache.add(("db_en", "Weapon", 1))
+        self.assertIn(("db_en", "Weapon", 1), cache)
+        self.assertNotIn(("db_en", "Weapon", 2), cache)
+
+        monotonic.return_value = 129.0
+        self.assertIn(("db_en", "Weapon", 1), cache)
+        monotonic.return_value = 131.0
+        self.assertNotIn(("db_en", "Weapon", 1), cache)
+        self.assertEqual(cache.as_dict(), {"hits": 2, "size": 0})
+
+    def test_disabled(self):
+        cache = NegativeCache(ttl=0, max_size=10)
+        cache.add(("db_en", "Weapon", 1))
+        self.assertNotIn(("db_en", "Weapon", 1), cache)
+
+    def test_clear(self):
+        cache = NegativeCache(ttl=30, max_size=10)
+        for key in (("db_en", 1), ("db_en", 2), ("db_fr", 1)):
+            cache.add(key)
+        cache.clear("db_en")
+        self.assertNotIn(("db_en", 1), cache)
+        self.assertNotIn(("db_en", 2), cache)
+        self.assertIn(("db_fr", 1), cache)
+        cache.clear()
+        self.assertNotIn(("db_fr", 1), cache)
+
+    def test_eviction(self):
+        cache = NegativeCache(ttl=30, max_size=2)
+        for key in (("db", 1), ("db", 2), ("db", 3)):
+            cache.add(key)
+        self.assertNotIn(("db", 1), cache)
+        self.assertIn(("db", 2), cache)
+        self.assertIn(("db", 3), cache)
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.single_flight = SingleFlight()
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def compute(self, result="done"):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def start(self, key, count, result="done") -> list[asyncio.Task]:
+        tasks = [
+            asyncio.create_task(
+                self.single_flight.do(key, lambda: self.compute(result))
+            )
+            for _ in range(count)
+        ]
+        # Let every caller reach the shared future
+        await asyncio.sleep(0)
+        return tasks
+
+    async def test_share_result(self):
+        tasks = await self.start("a", 3)
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*tasks), ["done"] * 3)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(
+            self.single_flight.as_dict(),
+            {"executed": 1, "coalesced": 2, "in_flight": 0},
+        )
+
+        # Once done the key is computed again
+        self.assertEqual(await self.single_flight.do("a", self.compute), "done")
+        self.assertEqual(self.calls, 2)
+
+    async def test_share_exception(self):
+        tasks = await self.start("a", 3, ValueError("boom"))
+        self.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(self.single_flight.as_dict()["in_flight"], 0)
+
+    async def test_keys_are_independent(self):
+        tasks = [*await self.start("a", 1), *await self.start("b", 1)]
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.calls, 2)
+
+    async def test_cancelled_caller(self):
+        first, second = await self.start("a", 2)
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.release.set()
+        self.assertEqual(await second, "done")
+
+        # Even the last waiter leaving does not cancel the computation
+        self.release.clear()
+        (only,) = await self.start("b", 1)
+        only.cancel()
+        await asyncio.sleep(0)
+        self.assertEqual(self.single_flight.as_dict()["in_flight"], 1)
+        late = asyncio.create_task(self.single_flight.do("b", self.compute))
+        self.release.set()
+        self.assertEqual(await late, "done")
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
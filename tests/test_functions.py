@@ -0,0 +1,84 @@
+import unittest
+
+from destiny2_manifest_api.utils.functions import (
+    contains_sorted,
+    diff_paths,
+    intersect_sorted,
+    pack_hashes,
+    union_sorted,
+    unpack_hashes,
+)
+
+
+class PackHashesTest(unittest.TestCase):
+    def test_round_trip(self):
+        hashes = [2 ** 32 - 1, 7, 0, 7, 2 ** 31]
+        packed = pack_hashes(hashes)
+        self.assertEqual(len(packed), 4 * 4)
+        self.assertEqual(list(unpack_hashes(packed)), [0, 7, 2 ** 31, 2 ** 32 - 1])
+
+    def test_little_endian(self):
+        self.assertEqual(pack_hashes([1, 2 ** 32 - 2]), b"\1\0\0\0\xfe\xff\xff\xff")
+
+    def test_empty(self):
+        self.assertEqual(pack_hashes([]), b"")
+        self.assertEqual(list(unpack_hashes(b"")), [])
+
+
+class SortedSequencesTest(unittest.TestCase):
+    def test_intersect(self):
+        self.assertEqual(intersect_sorted([1, 3, 5, 7], [3, 4, 5, 8]), [3, 5])
+        self.assertEqual(intersect_sorted([5], list(range(0, 100, 5))), [5])
+        self.assertEqual(intersect_sorted(list(range(100)), [99, 100]), [99])
+        self.assertEqual(intersect_sorted([1, 2], [3, 4]), [])
+        self.assertEqual(intersect_sorted([], [1]), [])
+
+    def test_intersect_packed(self):
+        a = unpack_hashes(pack_hashes([2 ** 32 - 1, 1, 10]))
+        b = unpack_hashes(pack_hashes([10, 2 ** 32 - 1]))
+        self.assertEqual(intersect_sorted(a, b), [10, 2 ** 32 - 1])
+
+    def test_union(self):
+        self.assertEqual(union_sorted([1, 4], [2, 4, 6], [1, 9]), [1, 2, 4, 6, 9])
+        self.assertEqual(union_sorted([3]), [3])
+        self.assertEqual(union_sorted(), [])
+        self.assertEqual(union_sorted([], []), [])
+
+    def test_contains(self):
+        values = [2, 4, 2 ** 32 - 1]
+        self.assertTrue(contains_sorted(values, 4))
+        self.assertTrue(contains_sorted(values, 2 ** 32 - 1))
+        self.assertFalse(contains_sorted(values, 3))
+        self.assertFalse(contains_sorted(values, 2 ** 32))
+        self.assertFalse(contains_sorted([], 0))
+
+
+class DiffPathsTest(unittest.TestCase):
+    def test_equal(self):
+        doc = {"a": {"b": [1, {"c": 2}]}}
+        self.assertEqual(diff_paths(doc, {"a": {"b": [1, {"c": 2}]}}), [])
+
+    def test_nested(self):
+        old = {"name": "a", "stats": {"1": 10, "2": 20}, "sockets": [{"x": 1}]}
+        new = {"name": "a", "stats": {"1": 11, "2": 20}, "sockets": [{"x": 2}]}
+        self.assertEqual(diff_paths(old, new), ["sockets.0.x", "stats.1"])
+
+    def test_added_and_removed_keys(self):
+        old = {"a": 1, "b": {"c": 1}}
+        new = {"b": {"c": 1, "d": 2}, "e": 3}
+        self.assertEqual(diff_paths(old, new), ["a", "b.d", "e"])
+
+    def test_list_length_change(self):
+        old = {"hashes": [1, 2]}
+        self.assertEqual(diff_paths(old, {"hashes": [1, 2, 3]}), ["hashes"])
+
+    def test_type_change(self):
+        self.assertEqual(diff_paths({"a": {"b": 1}}, {"a": [1]}), ["a"])
+        self.assertEqual(diff_paths({"a": None}, {"a": 0}), ["a"])
+
+    def test_prefix(self):
+        self.assertEqual(diff_paths([1, 2], [1, 3], "plugs"), ["plugs.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
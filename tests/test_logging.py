@@ -0,0 +1,105 @@
+import io
+import json
+import logging
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from destiny2_manifest_api.utils.logging import Logger, LogPipeline
+
+
+class LogPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_pipeline(self, **kwargs) -> LogPipeline:
+        # The writer thread only wakes up early for a full batch
+        options = dict(flush_interval=60, batch_size=100, stream=io.StringIO())
+        options.update(kwargs)
+        pipeline = LogPipeline(Path(self.directory.name), **options)
+        self.addCleanup(self.close, pipeline)
+        return pipeline
+
+    @staticmethod
+    def close(pipeline: LogPipeline) -> None:
+        # The pipeline flushes once more at exit, leave it nothing to write to
+        pipeline.flush()
+        for f in pipeline._files.values():
+            f.close()
+        pipeline._files.clear()
+
+    def read(self, filename: str) -> list[dict]:
+        with open(Path(self.directory.name) / filename, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_flush(self):
+        pipeline = self.make_pipeline()
+        pipeline.submit("a.log", {"message": "é"})
+        pipeline.submit("b.log", {"message": "b"})
+        pipeline.flush()
+        self.assertEqual(self.read("a.log"), [{"message": "é"}])
+        self.assertEqual(self.read("b.log"), [{"message": "b"}])
+        self.assertEqual(pipeline.stream.getvalue().count("\n"), 2)
+        self.assertEqual(pipeline.as_dict()["written"], 2)
+
+    def test_overflow_drops_oldest(self):
+        pipeline = self.make_pipeline(capacity=3)
+        for i in range(5):
+            pipeline.submit("a.log", {"i": i})
+        self.assertEqual(pipeline.dropped_overflow, 2)
+        pipeline.flush()
+        self.assertEqual(self.read("a.log"), [{"i": 2}, {"i": 3}, {"i": 4}])
+
+    def test_full_batch_wakes_writer(self):
+        pipeline = self.make_pipeline(batch_size=5)
+        for i in range(5):
+            pipeline.submit("a.log", {"i": i})
+        deadline = time.monotonic() + 5
+        while pipeline.written < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pipeline.written, 5)
+
+
+class LoggerTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pipeline = LogPipeline(
+            Path(directory.name), flush_interval=60, stream=io.StringIO()
+        )
+        # Nothing is ever written, don't leave records for the flush at exit
+        self.addCleanup(self.pipeline._buffer.clear)
+        self.logger = Logger(
+            "test", "test.log", logging.DEBUG, self.pipeline, rate=0.001, burst=2
+        )
+
+    def test_sampling_per_call_site(self):
+        for _ in range(5):
+            self.logger.info("repeated")
+        self.logger.info("other call site")
+        self.assertEqual(len(self.pipeline._buffer), 3)
+        self.assertEqual(self.pipeline.dropped_sampled["test"], 3)
+
+    def test_errors_are_never_sampled(self):
+        for _ in range(5):
+            self.logger.warning("warning")
+            try:
+                raise ValueError("boom")
+            except ValueError as e:
+                self.logger.exception(e)
+        self.assertEqual(len(self.pipeline._buffer), 10)
+        self.assertEqual(self.pipeline.dropped_sampled["test"], 0)
+        _, record = self.pipeline._buffer[-1]
+        self.assertEqual(record["level"], "ERROR")
+        self.assertIn("ValueError: boom", record["exception"])
+
+    def test_level(self):
+        self.logger.level = logging.INFO
+        self.logger.debug("hidden")
+        self.assertEqual(len(self.pipeline._buffer), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
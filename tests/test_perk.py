@@ -0,0 +1,26 @@
+import unittest
+
+from destiny2_manifest_api.app.apis.perk import _merge_terms, _rolls_together
+
+
+class PerkTermsTest(unittest.TestCase):
+    def test_merge_terms(self):
+        # hash=201&name=Outlaw, the name also matches the enhanced plug 202
+        self.assertEqual(_merge_terms([{201}, {201, 202}]), [{201}])
+        self.assertEqual(_merge_terms([{201}, {300}]), [{201}, {300}])
+        self.assertEqual(_merge_terms([{1, 2}, {2, 3}, {5}]), [{2}, {5}])
+
+    def test_rolls_together(self):
+        weapon = 7
+        outlaw = {"3": [weapon]}
+        rampage = {"4": [weapon]}
+        either_column = {"3": [weapon], "4": [1, weapon]}
+        self.assertTrue(_rolls_together([outlaw, rampage], weapon))
+        self.assertFalse(_rolls_together([outlaw, {"3": [weapon]}], weapon))
+        # Requires moving the first perk to its other column
+        self.assertTrue(_rolls_together([either_column, outlaw], weapon))
+        self.assertFalse(_rolls_together([outlaw, {"4": [1]}], weapon))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient
+
+from destiny2_manifest_api.app.profiling import ProfilingMiddleware
+from destiny2_manifest_api.utils.profiling import span
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+class ProfilingMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def make_client(self, **kwargs) -> AsyncClient:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        options = dict(admin_token="secret", sample_rate=0, sample_interval=0.001)
+        options.update(kwargs)
+        app = FastAPI()
+
+        @app.get("/stream")
+        async def stream():
+            async def body():
+                for chunk in (b"a", b"b"):
+                    with span("render chunk"):
+                        yield chunk
+
+            return StreamingResponse(body())
+
+        app.middleware("http")(ProfilingMiddleware(directory=self.directory, **options))
+        client = AsyncClient(app=app, base_url="http://test")
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    def span_names(self, report: dict) -> list[str]:
+        frames = report["shared"]["frames"]
+        return [
+            frames[event["frame"]]["name"]
+            for event in report["profiles"][0]["events"]
+            if event["type"] == "O"
+        ]
+
+    async def test_not_profiled(self):
+        client = await self.make_client()
+        for headers in (
+            {},
+            {"X-Profile": "store"},
+            {"X-Profile": "store", "X-Admin-Token": "wrong"},
+        ):
+            response = await client.get("/stream", headers=headers)
+            self.assertEqual(response.content, b"ab")
+            self.assertNotIn("x-profile-report", response.headers)
+        self.assertEqual(list(self.directory.glob("*")), [])
+
+    async def test_return_covers_body(self):
+        client = await self.make_client()
+        response = await client.get("/stream", headers={"X-Profile": "return", **ADMIN})
+        report = response.json()
+        self.assertEqual(self.span_names(report), ["render chunk"] * 2)
+        self.assertEqual(list(self.directory.glob("*")), [])
+
+    async def test_store_covers_body(self):
+        client = await self.make_client()
+        response = await client.get("/stream", headers={"X-Profile": "store", **ADMIN})
+        self.assertEqual(response.content, b"ab")
+        path = self.directory / response.headers["x-profile-report"]
+        report = json.loads(path.read_text())
+        self.assertEqual(self.span_names(report), ["render chunk"] * 2)
+
+    async def test_retention(self):
+        client = await self.make_client(sample_rate=1, max_reports=2)
+        names = [
+            (await client.get("/stream")).headers["x-profile-report"] for _ in range(4)
+        ]
+        stored = sorted(path.name for path in self.directory.iterdir())
+        self.assertEqual(stored, names[-2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from destiny2_manifest_api.utils.snapshot import Snapshot, SnapshotWriter
+
+
+class SnapshotRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "manifest.snapshot"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, records: list[tuple[str, int, dict]]) -> Snapshot:
+        writer = SnapshotWriter(self.path)
+        for table, hash, record in records:
+            writer.add(table, hash, record)
+        snapshot = Snapshot(writer.close())
+        self.addCleanup(snapshot.mm.close)
+        return snapshot
+
+    def test_round_trip(self):
+        records = [
+            ("DestinyInventoryItemDefinition", 3, {"name": "c"}),
+            ("DestinyInventoryItemDefinition", 1, {"name": "a", "list": [1, 2]}),
+            ("DestinyStatDefinition", 2, {"name": "b"}),
+        ]
+        snapshot = self.write(records)
+        for table, hash, record in records:
+            self.assertEqual(snapshot.get(table, hash), record)
+        self.assertIsNone(snapshot.get("DestinyStatDefinition", 1))
+        self.assertIsNone(snapshot.get("DestinyStatDefinition", 4))
+        self.assertFalse(self.path.with_name(f"{self.path.name}.tmp").exists())
+
+    def test_empty(self):
+        snapshot = self.write([])
+        self.assertEqual(snapshot.tables, {})
+        self.assertNotIn("DestinyInventoryItemDefinition", snapshot)
+
+    def test_hashes_near_uint32_limit(self):
+        hashes = [0, 2 ** 31 - 1, 2 ** 31, 2 ** 32 - 2, 2 ** 32 - 1]
+        snapshot = self.write([("Table", h, {"hash": h}) for h in reversed(hashes)])
+        for h in hashes:
+            self.assertEqual(snapshot.get("Table", h), {"hash": h})
+        self.assertIsNone(snapshot.get("Table", 2 ** 32 - 3))
+
+    def test_non_ascii_records(self):
+        records = [
+            ("DestinyLoreDefinition", 1, {"name": "Ahamkara ✦ 「願い」"}),
+            ("DestinyLoreDefinition", 2, {"description": "Éris Morn — 🌑"}),
+            # Odd length table name and records, the arrays must stay aligned
+            ("Lore", 3, {"x": "é"}),
+        ]
+        snapshot = self.write(records)
+        for table, hash, record in records:
+            self.assertEqual(snapshot.get(table, hash), record)
+
+    def test_abort(self):
+        writer = SnapshotWriter(self.path)
+        writer.add("Table", 1, {"hash": 1})
+        writer.abort()
+        self.assertTrue(writer.file.closed)
+        self.assertEqual(list(self.path.parent.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import copy
+import json
+import unittest
+from unittest import mock
+
+from destiny2_manifest_api import config
+from destiny2_manifest_api.app.models import mongo
+from destiny2_manifest_api.app.models.base_model import InvalidField
+from destiny2_manifest_api.app.models.inventory_item import Weapon
+from destiny2_manifest_api.utils.cache import negative_cache
+from destiny2_manifest_api.utils.constants import (
+    SOCKET_CATEGORY_MAPPING,
+    TIER_TYPE_MAPPING,
+)
+
+WEAPON_HASH = 1000
+CATEGORIES = ("intrinsic", "perks", "mods", "cosmetics")
+
+
+def definitions() -> dict[str, list[dict]]:
+    items = [
+        {
+            "_id": WEAPON_HASH,
+            "json": {
+                "displayProperties": {"name": "Gun"},
+                "inventory": {"tierTypeHash": TIER_TYPE_MAPPING["legendary"]},
+                "stats": {"stats": {"10": {"statHash": 10, "value": 50}}},
+                "sockets": {
+                    "socketEntries": [
+                        {"singleInitialItemHash": 2000},
+                        {"randomizedPlugSetHash": 3000},
+                        {"singleInitialItemHash": 2002},
+                        {"singleInitialItemHash": 2003},
+                    ],
+                    "socketCategories": [
+                        {
+                            "socketCategoryHash": SOCKET_CATEGORY_MAPPING[category],
+                            "socketIndexes": [index],
+                        }
+                        for index, category in enumerate(CATEGORIES)
+                    ],
+                },
+            },
+        },
+        *(
+            {
+                "_id": plug_hash,
+                "json": {
+                    "displayProperties": {"name": name},
+                    "investmentStats": stats,
+                },
+            }
+            for plug_hash, name, stats in (
+                (2000, "Frame", []),
+                (2001, "Outlaw", [{"statTypeHash": 10, "value": 5}]),
+                (2002, "Mod", []),
+                (2003, "Shader", []),
+            )
+        ),
+    ]
+    return {
+        "DestinyInventoryItemDefinition": items,
+        "DestinyPlugSetDefinition": [
+            {"_id": 3000, "json": {"reusablePlugItems": [{"plugItemHash": 2001}]}}
+        ],
+        "DestinySocketCategoryDefinition": [
+            {
+                "_id": SOCKET_CATEGORY_MAPPING[category],
+                "json": {"displayProperties": {"name": category.upper()}},
+            }
+            for category in CATEGORIES
+        ],
+        "DestinyStatDefinition": [
+            {"_id": 10, "json": {"displayProperties": {"name": "Impact"}}}
+        ],
+    }
+
+
+class FakeCollection:
+    def __init__(self, docs: list[dict]) -> None:
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    async def find_one(self, filter, projection=None, sort=None):
+        doc = self.docs.get(filter.get("_id"))
+        return copy.deepcopy(doc)
+
+
+class WeaponTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        db = {name: FakeCollection(docs) for name, docs in definitions().items()}
+        for patch in (
+            mock.patch.object(
+                type(mongo), "db", new_callable=mock.PropertyMock, return_value=db
+            ),
+            mock.patch.object(config, "SNAPSHOT_ENABLED", False),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        negative_cache.clear()
+
+    async def as_dict(self, fields: str | None) -> dict:
+        weapon = await Weapon(hash=WEAPON_HASH, fields=Weapon.parse_fields(fields))
+        # Socket indexes are int keys of nested defaultdicts
+        return json.loads(json.dumps(await weapon.as_dict()))
+
+    def test_parse_fields(self):
+        self.assertIsNone(Weapon.parse_fields(None))
+        self.assertIsNone(Weapon.parse_fields(""))
+        self.assertEqual(
+            Weapon.parse_fields(" name, sockets.perks ,"), {"name", "sockets.perks"}
+        )
+        self.assertEqual(
+            Weapon.parse_fields("sockets,plug.stats"), {"sockets", "plug.stats"}
+        )
+        for fields in ("name,colour", "plug.stats", "name,plug.stats"):
+            with self.subTest(fields=fields):
+                with self.assertRaises(InvalidField):
+                    Weapon.parse_fields(fields)
+
+    def test_gen_projection(self):
+        weapon = object.__new__(Weapon)
+        for fields, projection in (
+            ({"name"}, ("iconWatermark", "inventory")),
+            ({"stats"}, ("iconWatermark", "inventory", "stats")),
+            ({"sockets.mods"}, ("iconWatermark", "inventory", "sockets")),
+            (
+                set(Weapon.DEFAULT_FIELDS),
+                ("iconWatermark", "inventory", "stats", "sockets"),
+            ),
+        ):
+            with self.subTest(fields=fields):
+                weapon.fields = fields
+                self.assertEqual(weapon._gen_projection(), projection)
+
+    async def test_default_fields(self):
+        result = await self.as_dict(None)
+        self.assertEqual(result["hash"], WEAPON_HASH)
+        self.assertEqual(result["name"], "Gun")
+        self.assertEqual(result["stats"], {"Impact": 50})
+        # Masterworks and decorators of Legendary weapons are left out
+        self.assertEqual(
+            result["sockets"],
+            {
+                "INTRINSIC": {"0": {"initial_item": ["Frame"]}},
+                "PERKS": {"0": {"possible_items": ["Outlaw"]}},
+            },
+        )
+
+    async def test_selected_fields(self):
+        self.assertEqual(await self.as_dict("name"), {"name": "Gun"})
+        self.assertEqual(
+            await self.as_dict("hash,sockets.perks"),
+            {
+                "hash": WEAPON_HASH,
+                "sockets": {"PERKS": {"0": {"possible_items": ["Outlaw"]}}},
+            },
+        )
+
+    async def test_explicit_legendary_categories(self):
+        self.assertEqual(
+            await self.as_dict("sockets.mods,sockets.cosmetics"),
+            {
+                "sockets": {
+                    "MODS": {"0": {"initial_item": ["Mod"]}},
+                    "COSMETICS": {"0": {"initial_item": ["Shader"]}},
+                }
+            },
+        )
+
+    async def test_plug_stats(self):
+        result = await self.as_dict("sockets.perks,plug.stats")
+        self.assertEqual(
+            result["sockets"]["PERKS"]["0"]["possible_items"],
+            [{"name": "Outlaw", "stats": {"Impact": "+5"}}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()